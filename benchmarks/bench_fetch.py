@@ -0,0 +1,61 @@
+"""Benchmark of the Arrow and tuple fetch paths of the Snowflake configuration source.
+
+Each fetch mode runs in its own process, so peak RSS is comparable. Requires
+the Snowflake credentials in the environment (or `.env`) like the flow itself.
+
+Usage: python benchmarks/bench_fetch.py COMPONENT_ID [COMPONENT_ID ...]
+"""
+import os
+import resource
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+
+MODES = ["tuples", "arrow"]
+
+
+def run(component_ids):
+    from schemas.payload import format_configurations
+    from schemas.snapshot import get_latest_job_snapshot
+    from schemas.sources import SnowflakeSource
+
+    # Keep the one-off snapshot refresh out of the measurement
+    get_latest_job_snapshot()
+    source = SnowflakeSource()
+
+    start = time.perf_counter()
+    source.get_component_ids()
+    component_ids_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for component_id in component_ids:
+        format_configurations(source.iter_configurations([component_id]))
+    configurations_time = time.perf_counter() - start
+
+    peak_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(
+        f"{os.environ['SNOWFLAKE_FETCH_MODE']:>6}: get_component_ids {component_ids_time:7.2f}s, "
+        f"configurations {configurations_time:7.2f}s, peak RSS {peak_rss_mb:8.1f} MB"
+    )
+
+
+def main():
+    if len(sys.argv) > 2 and sys.argv[1] == "--run":
+        run(sys.argv[2:])
+        return
+    if len(sys.argv) < 2:
+        sys.exit(__doc__)
+
+    for mode in MODES:
+        subprocess.run(
+            [sys.executable, __file__, "--run", *sys.argv[1:]],
+            env={**os.environ, "SNOWFLAKE_FETCH_MODE": mode},
+            check=True,
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,261 @@
+"""Offline end-to-end benchmark of SchemaFlow.
+
+The flow runs against a synthetic catalogue generated from `sample_data.csv`
+and served by the local configuration source, with an optional delay that
+stands in for the warehouse query latency. Every agent uses a deterministic
+stub LLM with a fixed latency that fails a given share of the generations, so
+no network access is needed. Everything the run writes goes to a temporary
+directory.
+
+The report is built from the metrics log of the run: throughput, latency per
+component, peak RSS and the time spent in the tools, in validating the
+generated JSONL and in `save_schemas`. The flow validates the output itself,
+so validation is reported separately from the Check Output tool.
+
+Usage: python benchmarks/bench_flow.py [--components 100 --copies 7] [--llm-latency 0.5] [--prefetch pipelined]
+"""
+import argparse
+import csv
+import json
+import os
+import random
+import re
+import resource
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "src"))
+
+
+def write_catalogue(path: str, components: int, copies: int) -> dict:
+    """Write a synthetic catalogue of configurations based on `sample_data.csv`.
+
+    Component `i` is a copy of the i-th sample component (round robin) with each
+    of its configurations repeated `copies` times under new IDs.
+
+    Returns:
+        dict: Number of components, configurations and rows written
+    """
+    with open(os.path.join(ROOT, "sample_data.csv"), newline="", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        fieldnames = reader.fieldnames
+        sample_rows = list(reader)
+
+    templates = {}
+    for row in sample_rows:
+        templates.setdefault(row["component_id"], []).append(row)
+    template_ids = sorted(templates)
+
+    config_ids = set()
+    written = 0
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames)
+        writer.writeheader()
+        for i in range(components):
+            template_id = template_ids[i % len(template_ids)]
+            component_id = f"{template_id}-bench-{i}"
+            for copy in range(copies):
+                for row in templates[template_id]:
+                    suffix = f"-{i}-{copy}"
+                    row = {
+                        **row,
+                        "component_id": component_id,
+                        "config_id": row["config_id"] + suffix,
+                        "row_id": row["row_id"] and row["row_id"] + suffix,
+                        "job_id": row["job_id"] and row["job_id"] + suffix,
+                    }
+                    writer.writerow(row)
+                    config_ids.add(row["config_id"])
+                    written += 1
+    return {"components": components, "configurations": len(config_ids), "rows": written}
+
+
+def make_stub_llm(latency: float, failure_rate: float, seed: int):
+    """Return a deterministic stand-in for the LLM used by every agent.
+
+    It answers in the text format of the crewAI agent executor: the analyst
+    first calls the Get Configurations tool, then every agent gives a final
+    answer. The generated JSONl is invalid in `failure_rate` of the attempts,
+    decided by the seed, the component and the attempt.
+    """
+    from crewai.llms.base_llm import BaseLLM
+
+    class StubLLM(BaseLLM):
+        def __init__(self):
+            super().__init__(model="stub")
+            self.calls = 0
+            self.failures = 0
+            self._generations = {}
+            self._lock = threading.Lock()
+
+        def call(self, messages, tools=None, callbacks=None, available_functions=None):
+            time.sleep(latency)
+            if isinstance(messages, str):
+                messages = [{"role": "user", "content": messages}]
+            text = "\n".join(str(message.get("content", "")) for message in messages)
+            with self._lock:
+                self.calls += 1
+
+            match = re.search(r"Keboola Connection component (\S+) and select", text)
+            if match:
+                # The tool prompt itself mentions "Observation:", a tool call shows up as
+                # an assistant message once the executor has appended its result
+                called = any(
+                    message.get("role") == "assistant" and "Action: Get Configurations" in str(message.get("content", ""))
+                    for message in messages
+                )
+                if not called:
+                    return (
+                        "Thought: I need the configurations of the component.\n"
+                        "Action: Get Configurations\n"
+                        f"Action Input: {json.dumps({'component_id': match.group(1)})}"
+                    )
+                return "Thought: I now know the final answer\nFinal Answer: The selected configurations."
+
+            match = re.search(r"few-shot learning for (\S+?)\.?\s", text)
+            if match is None:
+                return "Thought: I now know the final answer\nFinal Answer: The sanitized configurations."
+
+            component_id = match.group(1)
+            with self._lock:
+                attempt = self._generations[component_id] = self._generations.get(component_id, 0) + 1
+            if random.Random(f"{seed}/{component_id}/{attempt}").random() < failure_rate:
+                with self._lock:
+                    self.failures += 1
+                return "Thought: I now know the final answer\nFinal Answer: {\"component_id\": "
+            record = {"component_id": component_id, "config_example": {"parameters": {}}, "config_row_example": {}}
+            return "Thought: I now know the final answer\nFinal Answer: " + json.dumps(record)
+
+        def supports_function_calling(self) -> bool:
+            return False
+
+        def supports_stop_words(self) -> bool:
+            return True
+
+        def get_context_window_size(self) -> int:
+            return 128000
+
+    return StubLLM()
+
+
+def install_stub_llm(llm):
+    """Make every crew use the stub LLM and keep the crew logs quiet."""
+    from crewai import Crew
+
+    kickoff = Crew.kickoff
+
+    def stub_kickoff(self, *args, **kwargs):
+        self.verbose = False
+        for agent in self.agents:
+            agent.llm = llm
+            agent.verbose = False
+        return kickoff(self, *args, **kwargs)
+
+    Crew.kickoff = stub_kickoff
+
+
+def install_query_latency(latency: float):
+    """Delay every configuration query of the local source, like a warehouse round trip."""
+    from schemas import sources
+
+    class DelayedSource(sources.LocalFileSource):
+        def iter_configurations(self, component_ids, skip_config_ids=None, batch_size: int = 500):
+            time.sleep(latency)
+            yield from super().iter_configurations(component_ids, skip_config_ids, batch_size)
+
+    # Replaces the class before the process-wide source is created on first use
+    sources.LocalFileSource = DelayedSource
+
+
+def percentile(values, fraction: float) -> float:
+    """Return the nearest-rank percentile of the values."""
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[max(0, min(len(values) - 1, round(fraction * len(values)) - 1))]
+
+
+def report(events: list[dict], wall_time: float, llm):
+    components = [event["duration"] for event in events if event["kind"] == "component"]
+    stages = {event["stage"]: event["duration"] for event in events if event["kind"] == "stage"}
+    tools = {}
+    for event in events:
+        if event["kind"] == "tool":
+            tools[event["tool"]] = tools.get(event["tool"], 0.0) + event["duration"]
+    validation_time = sum(event["duration"] for event in events if event["kind"] == "validation")
+    generate_time = stages.get("generate_sample_jsons", wall_time)
+    peak_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+    print(f"Wall time: {wall_time:.1f}s, peak RSS {peak_rss_mb:.0f} MB")
+    print(
+        f"Components: {len(components)} generated, "
+        f"{len(components) / generate_time * 60 if generate_time else 0:.1f} components/min"
+    )
+    print(f"Latency per component: p50 {percentile(components, 0.5):.2f}s, p95 {percentile(components, 0.95):.2f}s")
+    print(f"LLM: {llm.calls} calls, {llm.failures} invalid generations")
+    print("Time split:")
+    for name, duration in sorted(tools.items()):
+        print(f"  tool {name:<24} {duration:8.2f}s")
+    print(f"  {'validation':<29} {validation_time:8.2f}s")
+    for name, duration in stages.items():
+        print(f"  stage {name:<23} {duration:8.2f}s")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--components", type=int, default=20, help="Number of synthetic components.")
+    parser.add_argument("--copies", type=int, default=1, help="Copies of each sample configuration per component (about 16 configurations per copy).")
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="Seconds per LLM call.")
+    parser.add_argument("--failure-rate", type=float, default=0.1, help="Share of invalid generations.")
+    parser.add_argument("--query-latency", type=float, default=0.0, help="Seconds per configuration query.")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--prefetch", choices=["bulk", "pipelined"], default="bulk")
+    parser.add_argument("--retry-mode", choices=["partial", "full"], default="partial")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix="bench_flow_")
+    os.chdir(workdir)
+    os.makedirs("output", exist_ok=True)
+    catalogue = write_catalogue(os.path.join(workdir, "catalogue.csv"), args.components, args.copies)
+    print(
+        f"Catalogue: {catalogue['components']} components, {catalogue['configurations']} configurations, "
+        f"{catalogue['rows']} rows in {workdir}"
+    )
+
+    os.environ.update({
+        "CONFIGURATION_SOURCE": "local",
+        "CONFIGURATION_FILE": os.path.join(workdir, "catalogue.csv"),
+        "MODEL": "stub/offline",
+        "CREWAI_DISABLE_TELEMETRY": "true",
+        "OTEL_SDK_DISABLED": "true",
+    })
+    from json_schemas.main import SchemaFlow
+    from schemas.metrics import get_metrics
+
+    llm = make_stub_llm(args.llm_latency, args.failure_rate, args.seed)
+    install_stub_llm(llm)
+    if args.query_latency:
+        install_query_latency(args.query_latency)
+
+    start = time.perf_counter()
+    SchemaFlow().kickoff(inputs={
+        "concurrency": args.concurrency,
+        "retry_mode": args.retry_mode,
+        "prefetch_mode": args.prefetch,
+    })
+    wall_time = time.perf_counter() - start
+
+    metrics = get_metrics()
+    metrics.close()
+    with open(metrics.events_path, encoding="utf-8") as f:
+        events = [json.loads(line) for line in f]
+    report(events, wall_time, llm)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""Micro-benchmark of the configuration payload size budgeting.
+
+Compares the previous implementation, which re-serialized the whole list after
+every row, with `schemas.payload.format_configurations`. Rows are synthesized
+from `sample_data.csv`.
+
+Usage: python benchmarks/bench_payload.py [number_of_rows]
+"""
+import csv
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+
+from schemas.payload import MAX_PAYLOAD_SIZE, format_configurations, parse_configuration  # noqa: E402
+
+
+def format_configurations_quadratic(rows, max_size=MAX_PAYLOAD_SIZE):
+    configs = []
+    for config in rows:
+        configs.append(parse_configuration(config))
+        if len(json.dumps(configs, indent=2)) > max_size:
+            configs.pop()
+            break
+    return json.dumps(configs, indent=2)
+
+
+def load_rows(count):
+    with open(os.path.join(ROOT, "sample_data.csv"), newline="") as f:
+        rows = [row for row in csv.DictReader(f) if row["config_json"] not in ("", "{}")]
+    return [rows[i % len(rows)] for i in range(count)]
+
+
+def measure(func, rows, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        output = func(rows)
+        best = min(best, time.perf_counter() - start)
+    return best, output
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    rows = load_rows(count)
+
+    old_time, old_output = measure(format_configurations_quadratic, rows)
+    new_time, new_output = measure(format_configurations, rows)
+
+    assert old_output == new_output, "Outputs differ"
+    print(f"rows available: {count}, payload size: {len(new_output)} chars")
+    print(f"quadratic:   {old_time * 1000:8.2f} ms")
+    print(f"incremental: {new_time * 1000:8.2f} ms")
+    print(f"speed-up:    {old_time / new_time:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""Benchmark of the secret redaction engine on configurations from `sample_data.csv`.
+
+Usage: python benchmarks/bench_redaction.py [number_of_configurations]
+"""
+import csv
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+
+from schemas.payload import parse_configuration  # noqa: E402
+from schemas.redaction import redact_configuration  # noqa: E402
+
+
+def load_configurations():
+    with open(os.path.join(ROOT, "sample_data.csv"), newline="") as f:
+        return [parse_configuration(row) for row in csv.DictReader(f)]
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    sample = load_configurations()
+    configs = [sample[i % len(sample)] for i in range(count)]
+
+    start = time.perf_counter()
+    redacted = [redact_configuration(config) for config in configs]
+    elapsed = time.perf_counter() - start
+
+    replaced = sum(
+        json.dumps(config).count("<secret>") + json.dumps(config).count("<redacted>")
+        for config in redacted[:len(sample)]
+    )
+    print(f"configurations: {count}, values replaced in sample_data.csv: {replaced}")
+    print(f"elapsed: {elapsed * 1000:.1f} ms, {count / elapsed:,.0f} configurations/s")
+
+
+if __name__ == "__main__":
+    main()
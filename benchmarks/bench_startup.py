@@ -0,0 +1,82 @@
+"""Benchmark of the startup and crew construction overhead.
+
+Import times are measured in fresh interpreters, which also report whether the
+heavy dependencies were loaded. Crew construction compares building a new
+`JsonCrew` with its crew, as every attempt used to do, against copying the
+crew template of the shared instance.
+
+Usage: python benchmarks/bench_startup.py [--runs 5] [--crews 20]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "src"))
+
+HEAVY_MODULES = ["crewai", "snowflake.connector", "json_schemas.crews.json_crew.json_crew"]
+IMPORTS = {
+    "schemas.processor": "import schemas.processor",
+    "json_schemas.main": "import json_schemas.main",
+}
+MEASURE = """
+import sys, time
+sys.path[:0] = [{src!r}, {root!r}]
+start = time.perf_counter()
+{statement}
+elapsed = time.perf_counter() - start
+print(elapsed, ",".join(name for name in {heavy!r} if name in sys.modules))
+"""
+
+
+def measure_import(statement: str, runs: int):
+    times = []
+    loaded = ""
+    for _ in range(runs):
+        code = MEASURE.format(src=os.path.join(ROOT, "src"), root=ROOT, statement=statement, heavy=HEAVY_MODULES)
+        output = subprocess.run(
+            [sys.executable, "-c", code], capture_output=True, text=True, check=True, cwd=ROOT
+        ).stdout.split()
+        times.append(float(output[0]))
+        loaded = output[1] if len(output) > 1 else "-"
+    return statistics.median(times), loaded
+
+
+def measure_crews(count: int):
+    from json_schemas.crews.json_crew.json_crew import JsonCrew
+
+    start = time.perf_counter()
+    for _ in range(count):
+        JsonCrew().crew()
+    rebuild_time = (time.perf_counter() - start) / count
+
+    json_crew = JsonCrew()
+    json_crew.copy_crew()
+    start = time.perf_counter()
+    for _ in range(count):
+        json_crew.copy_crew()
+    copy_time = (time.perf_counter() - start) / count
+    return rebuild_time, copy_time
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters per import.")
+    parser.add_argument("--crews", type=int, default=20, help="Crews built per construction mode.")
+    args = parser.parse_args(argv)
+
+    for name, statement in IMPORTS.items():
+        elapsed, loaded = measure_import(statement, args.runs)
+        print(f"import {name:<20} {elapsed * 1000:8.1f} ms, loaded: {loaded}")
+
+    rebuild_time, copy_time = measure_crews(args.crews)
+    print(f"JsonCrew().crew()       {rebuild_time * 1000:8.1f} ms per crew")
+    print(f"JsonCrew.copy_crew()    {copy_time * 1000:8.1f} ms per crew")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+import hashlib
+import json
+import os
+import time
+
+from schemas.payload import get_configurations_payload
+from schemas.store import SQLiteStore, process_singleton
+
+
+class CrewResultCache(SQLiteStore):
+    """Content-addressed SQLite cache of crew task outputs.
+
+    Outputs are stored per task under a key that identifies everything the crew
+    output depends on. When the stored outputs grow over `max_bytes`, the least
+    recently used ones are evicted.
+    """
+
+    def __init__(self, path: str, max_bytes: int):
+        super().__init__(path)
+        self.max_bytes = max_bytes
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS task_outputs ("
+                "key TEXT, task_name TEXT, output TEXT, size INTEGER, accessed_at REAL, "
+                "PRIMARY KEY (key, task_name))"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS task_outputs_accessed ON task_outputs (accessed_at)")
+
+    def get(self, key: str) -> dict[str, str]:
+        """Return cached task outputs of a key as a dictionary keyed by task name."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT task_name, output FROM task_outputs WHERE key = ?", (key,)
+            ).fetchall()
+            if rows:
+                conn.execute("UPDATE task_outputs SET accessed_at = ? WHERE key = ?", (time.time(), key))
+        return dict(rows)
+
+    def put(self, key: str, task_name: str, output: str):
+        """Store the output of a task and evict old entries over the size limit."""
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO task_outputs VALUES (?, ?, ?, ?, ?)",
+                (key, task_name, output, len(output.encode("utf-8")), time.time()),
+            )
+            self._evict(conn)
+
+    def discard(self, key: str, task_name: str = None):
+        """Remove the cached output of a task, or of all tasks of a key."""
+        with self._connect() as conn:
+            if task_name is None:
+                conn.execute("DELETE FROM task_outputs WHERE key = ?", (key,))
+            else:
+                conn.execute("DELETE FROM task_outputs WHERE key = ? AND task_name = ?", (key, task_name))
+
+    def _evict(self, conn):
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM task_outputs").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, task_name, size in conn.execute(
+            "SELECT key, task_name, size FROM task_outputs ORDER BY accessed_at"
+        ).fetchall():
+            conn.execute("DELETE FROM task_outputs WHERE key = ? AND task_name = ?", (key, task_name))
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+
+@process_singleton
+def get_crew_result_cache() -> CrewResultCache:
+    """Return the process-wide crew result cache.
+
+    The cache file is set by `CREW_CACHE_PATH` (default `.cache/crew_results.sqlite`)
+    and its size limit by `CREW_CACHE_MAX_BYTES` (default 100 MB).
+    """
+    return CrewResultCache(
+        os.getenv("CREW_CACHE_PATH", os.path.join(".cache", "crew_results.sqlite")),
+        int(os.getenv("CREW_CACHE_MAX_BYTES", str(100 * 1024 * 1024))),
+    )
+
+
+def configurations_hash(component_id: str) -> str:
+    """Return a hash of the configurations payload the crew would be given for a component.
+
+    The payload reflects the selection, redaction and payload format settings,
+    so changing any of them invalidates the cached outputs.
+    """
+    payload = get_configurations_payload(component_id) or ""
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def files_hash(paths) -> str:
+    """Return a hash of the contents of the given files."""
+    digest = hashlib.sha256()
+    for path in paths:
+        with open(path, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def crew_cache_key(component_id: str, prompt_hash: str, inputs: dict) -> str:
+    """Return the cache key of a crew run.
+
+    The key covers the component, the configurations it is given, the prompt
+    definitions, the crew inputs and the model name.
+    """
+    parts = {
+        "component_id": component_id,
+        "configurations": configurations_hash(component_id),
+        "prompts": prompt_hash,
+        "inputs": inputs,
+        "model": os.getenv("MODEL", ""),
+    }
+    content = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
@@ -1,15 +1,39 @@
+import os
+import threading
+from dataclasses import dataclass, field
+
 from crewai import Agent, Crew, Process, Task
 from crewai.project import CrewBase, agent, crew, task
 
+from src.json_schemas.crew_cache import crew_cache_key, files_hash, get_crew_result_cache
 from src.json_schemas.tools.get_configurations import GetConfigurationsTool
-from src.json_schemas.tools.check_output import CheckOutputTool
+from schemas.store import process_singleton
 
 # If you want to run a snippet of code before or after the crew starts,
 # you can use the @before_kickoff and @after_kickoff decorators
 # https://docs.crewai.com/concepts/crews#example-crew-class-with-decorators
 
-get_configurations_tool = GetConfigurationsTool()
-check_output_tool = CheckOutputTool()
+CONFIG_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "config")
+TASK_NAMES = ["analyze_configurations", "sanitize_configurations", "generate_training_data"]
+OUTPUT_FILE = 'output/sample_data_{component_id}.jsonl'
+
+
+@dataclass
+class CrewResult:
+    """Final output of a crew run together with the outputs of its tasks."""
+
+    raw: str
+    task_outputs: dict[str, str] = field(default_factory=dict)
+    cache_key: str = ""
+    cached: bool = False
+    token_usage: dict = field(default_factory=dict)
+
+
+def token_usage(result) -> dict:
+    """Return the LLM token counts of a crew output as a dictionary."""
+    usage = getattr(result, "token_usage", None)
+    return usage.model_dump() if usage is not None else {}
+
 
 @CrewBase
 class JsonCrew:
@@ -21,13 +45,19 @@ class JsonCrew:
     agents_config = "config/agents.yaml"
     tasks_config = "config/tasks.yaml"
 
+    def __init__(self):
+        # Crews built once from the parsed configuration, copied for every run
+        self._templates = {}
+        self._templates_lock = threading.Lock()
+        self._prompt_hash = None
+
     # If you would lik to add tools to your crew, you can learn more about it here:
     # https://docs.crewai.com/concepts/agents#agent-tools
     @agent
     def configuration_analyst(self) -> Agent:
         return Agent(
             config=self.agents_config["configuration_analyst"],
-            tools=[get_configurations_tool],
+            tools=[GetConfigurationsTool()],
         )       
     
     @agent
@@ -61,7 +91,14 @@ class JsonCrew:
     def generate_training_data(self) -> Task:
         return Task(
             config=self.tasks_config["generate_training_data"],
-            output_file='output/sample_data_{component_id}.jsonl'
+            output_file=OUTPUT_FILE
+        )
+
+    def regenerate_training_data(self) -> Task:
+        # Not a @task, so it is not part of the main crew
+        return Task(
+            config=self.tasks_config["regenerate_training_data"],
+            output_file=OUTPUT_FILE
         )
 
     @crew
@@ -79,3 +116,102 @@ class JsonCrew:
             memory=False,
             # planning_llm="gpt-4o"
         )
+
+    def retry_crew(self) -> Crew:
+        """Creates a crew that only re-runs the training data generation"""
+        return Crew(
+            agents=[self.training_data_generator()],
+            tasks=[self.regenerate_training_data()],
+            process=Process.sequential,
+            planning=False,
+            verbose=True,
+            memory=False,
+        )
+
+    def copy_crew(self, name: str = "crew") -> Crew:
+        """Return a fresh copy of a crew of this instance, ready to be kicked off with new inputs.
+
+        The crew (`crew` or `retry_crew`) is built once, copying it skips creating
+        the agents and tasks from the configuration again. Copies do not share
+        state, so they can run in parallel.
+        """
+        with self._templates_lock:
+            if name not in self._templates:
+                self._templates[name] = getattr(self, name)()
+            template = self._templates[name]
+        return template.copy()
+
+    def prompt_hash(self) -> str:
+        """Return the hash of the agent and task configuration the crews were built from."""
+        if self._prompt_hash is None:
+            self._prompt_hash = files_hash(
+                [os.path.join(CONFIG_DIR, "agents.yaml"), os.path.join(CONFIG_DIR, "tasks.yaml")]
+            )
+        return self._prompt_hash
+
+    def kickoff(self, inputs: dict) -> CrewResult:
+        """Run the crew, reusing cached task outputs when nothing they depend on changed."""
+        component_id = inputs["component_id"]
+        cache = get_crew_result_cache()
+        key = crew_cache_key(component_id, self.prompt_hash(), inputs)
+
+        cached = cache.get(key)
+        if all(name in cached for name in TASK_NAMES):
+            print(f"Using cached crew result for {component_id}")
+            output_file = OUTPUT_FILE.format(**inputs)
+            os.makedirs(os.path.dirname(output_file), exist_ok=True)
+            with open(output_file, "w") as f:
+                f.write(cached[TASK_NAMES[-1]])
+            return CrewResult(cached[TASK_NAMES[-1]], cached, key, cached=True)
+
+        if all(name in cached for name in TASK_NAMES[:-1]):
+            # Only the final output is missing, e.g. it was rejected by validation last time
+            return self.retry(inputs, CrewResult("", cached, key))
+
+        crew = self.copy_crew("crew")
+        result = crew.kickoff(inputs=inputs)
+        task_outputs = {
+            task.name: task_output.raw for task, task_output in zip(crew.tasks, result.tasks_output)
+        }
+        for name, output in task_outputs.items():
+            cache.put(key, name, output)
+        return CrewResult(result.raw, task_outputs, key, token_usage=token_usage(result))
+
+    def discard(self, result: CrewResult, all_tasks: bool = False):
+        """Drop a rejected result from the cache, so it is not served again.
+
+        Only the final output is dropped unless `all_tasks` is set, so that the
+        upstream task outputs can be reused by a partial retry.
+        """
+        get_crew_result_cache().discard(result.cache_key, None if all_tasks else TASK_NAMES[-1])
+
+    def retry(self, inputs: dict, previous: CrewResult, validation_error: str = "") -> CrewResult:
+        """Re-run only the training data generation, keeping the upstream task outputs.
+
+        Args:
+            inputs: Inputs of the original crew run.
+            previous: Result of the previous run, provides the sanitized configurations.
+            validation_error: Validation error of the previous output, passed to the agent as feedback.
+        """
+        if validation_error and previous.raw:
+            feedback = (
+                "A previous attempt was rejected by the validator with the following error, "
+                f"fix it: {validation_error}\n\nThe rejected output was:\n{previous.raw}"
+            )
+        else:
+            feedback = ""
+
+        result = self.copy_crew("retry_crew").kickoff(inputs={
+            **inputs,
+            "sanitized_configurations": previous.task_outputs[TASK_NAMES[1]],
+            "feedback": feedback,
+        })
+        task_outputs = {**previous.task_outputs, TASK_NAMES[-1]: result.raw}
+        get_crew_result_cache().put(previous.cache_key, TASK_NAMES[-1], result.raw)
+        return CrewResult(result.raw, task_outputs, previous.cache_key, token_usage=token_usage(result))
+
+
+@process_singleton
+def get_json_crew() -> JsonCrew:
+    """Return the process-wide JsonCrew, so its configuration is parsed only once."""
+    return JsonCrew()
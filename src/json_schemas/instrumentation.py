@@ -0,0 +1,51 @@
+import threading
+import time
+
+from schemas.metrics import get_metrics
+
+_started = {}  # id(task) -> perf_counter at the start
+_started_lock = threading.Lock()
+_installed = False
+
+
+def _task_finished(task, status: str):
+    with _started_lock:
+        started_at = _started.pop(id(task), None)
+    if started_at is None:
+        return
+    agent = getattr(task, "agent", None)
+    get_metrics().record(
+        "task",
+        time.perf_counter() - started_at,
+        task=getattr(task, "name", None) or "unknown",
+        agent=(getattr(agent, "role", None) or "unknown").strip(),
+        status=status,
+    )
+
+
+def install_crew_metrics():
+    """Record the wall time of every crew task together with the agent working on it.
+
+    crewAI emits the task events synchronously on the thread running the task,
+    so the labels set for that thread, e.g. the component ID, apply to them too.
+    """
+    global _installed
+    if _installed:
+        return
+    _installed = True
+
+    from crewai.utilities.events import crewai_event_bus
+    from crewai.utilities.events.task_events import TaskCompletedEvent, TaskFailedEvent, TaskStartedEvent
+
+    @crewai_event_bus.on(TaskStartedEvent)
+    def _started_handler(source, event):
+        with _started_lock:
+            _started[id(getattr(event, "task", None) or source)] = time.perf_counter()
+
+    @crewai_event_bus.on(TaskCompletedEvent)
+    def _completed_handler(source, event):
+        _task_finished(getattr(event, "task", None) or source, "ok")
+
+    @crewai_event_bus.on(TaskFailedEvent)
+    def _failed_handler(source, event):
+        _task_finished(getattr(event, "task", None) or source, "error")
@@ -0,0 +1,108 @@
+import os
+import time
+
+from schemas.store import SQLiteStore, process_singleton
+
+# Statuses after which a component does not need to be generated again. A `failed`
+# component is generated again in later runs, see `failed_runs` of `RunJournal.state`.
+FINISHED_STATUSES = ("validated", "saved")
+
+
+class RunJournal(SQLiteStore):
+    """Append-only journal of component generation stored in SQLite in WAL mode.
+
+    Every state change of a component is appended as an event, so after a crash
+    the flow knows which components are finished, their validated payload and
+    how many attempts the unfinished ones already used.
+    """
+
+    def __init__(self, path: str):
+        super().__init__(path)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS events ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, component_id TEXT, status TEXT, attempt INTEGER, "
+                "started_at REAL, finished_at REAL, message TEXT, payload TEXT)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS events_component ON events (component_id, id)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS watermarks ("
+                "component_id TEXT PRIMARY KEY, max_job_start_at TEXT, content_hash TEXT, updated_at REAL)"
+            )
+
+    def record(self, component_id: str, status: str, attempt: int = 0, started_at: float = None,
+               message: str = None, payload: str = None):
+        """Append an event of a component.
+
+        Args:
+            component_id: The component the event belongs to.
+            status: One of `started`, `attempt_failed`, `validated`, `failed` or `saved`.
+            attempt: Number of the generation attempt.
+            started_at: Start of the recorded step as a UNIX timestamp.
+            message: Validation error or other details.
+            payload: Generated JSONl of `validated` and `failed` events, `saved` events have none.
+        """
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO events (component_id, status, attempt, started_at, finished_at, message, payload) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (component_id, status, attempt, started_at, time.time(), message, payload),
+            )
+
+    def state(self, component_id: str) -> dict:
+        """Return the journaled state of a component.
+
+        Returns:
+            dict: `status` of the latest event (None if there is none), number of
+            `failed_attempts` of the current run, number of consecutive `failed_runs`
+            since the last validated output and the latest generated `payload`
+        """
+        with self._connect() as conn:
+            statuses = conn.execute(
+                "SELECT status FROM events WHERE component_id = ? ORDER BY id", (component_id,)
+            ).fetchall()
+            payload = conn.execute(
+                "SELECT payload FROM events WHERE component_id = ? AND payload IS NOT NULL "
+                "ORDER BY id DESC LIMIT 1",
+                (component_id,),
+            ).fetchone()
+        state = {"status": None, "failed_attempts": 0, "failed_runs": 0, "payload": payload and payload[0]}
+        for (status,) in statuses:
+            state["status"] = status
+            if status == "attempt_failed":
+                state["failed_attempts"] += 1
+            elif status in FINISHED_STATUSES or status == "failed":
+                state["failed_attempts"] = 0
+            if status == "validated":
+                state["failed_runs"] = 0
+            elif status == "failed":
+                state["failed_runs"] += 1
+        return state
+
+    def get_watermark(self, component_id: str):
+        """Return the watermark of the configurations the component was last generated from."""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT max_job_start_at, content_hash FROM watermarks WHERE component_id = ?", (component_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {"max_job_start_at": row[0], "content_hash": row[1]}
+
+    def save_watermark(self, component_id: str, watermark: dict):
+        """Store the watermark of the configurations the component was generated from."""
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO watermarks VALUES (?, ?, ?, ?)",
+                (component_id, watermark["max_job_start_at"], watermark["content_hash"], time.time()),
+            )
+
+
+@process_singleton
+def get_run_journal() -> RunJournal:
+    """Return the process-wide run journal.
+
+    The journal file is set by `RUN_JOURNAL_PATH` (default `output/journal.sqlite`).
+    """
+    return RunJournal(os.getenv("RUN_JOURNAL_PATH", os.path.join("output", "journal.sqlite")))
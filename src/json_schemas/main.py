@@ -1,108 +1,349 @@
 #!/usr/bin/env python
+import argparse
+import cProfile
 import json
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dotenv import load_dotenv
 from pydantic import BaseModel
 from crewai.flow import Flow, listen, start
-from json_schemas.crews.json_crew.json_crew import JsonCrew
-from schemas.processor import get_component_ids
-from json_schemas.tools.check_output import CheckOutputTool
+from schemas.db import get_pool_stats
+from schemas.cache import get_configuration_cache
+from schemas.metrics import get_metrics
+from schemas.pipeline import ConfigurationPrefetcher
+from schemas.processor import get_component_ids, iter_all_configurations
+from schemas.watermark import describe_change, get_component_watermark
+from json_schemas.instrumentation import install_crew_metrics
+from json_schemas.journal import FINISHED_STATUSES, get_run_journal
+from json_schemas.ratelimit import call_with_backoff, install_llm_rate_limiter
+from json_schemas.validation import validate_jsonl
 
 class SchemaState(BaseModel):
     component_ids: list[str] = []
     sample_jsons: dict[str, str] = {}
+    sample_records: dict[str, list[dict]] = {}
+    concurrency: int = 1
+    retry_mode: str = "partial"
+    dry_run: bool = False
+    prefetch_mode: str = "bulk"
+    prefetch_depth: int = 2
+    pre_sanitize: bool = False
+    profile_path: str = ""
 
 class SchemaFlow(Flow[SchemaState]):
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._state_lock = threading.Lock()
+
     @start()
     def retrieve_component_ids(self):
         print("Retrieving component IDs")
-        self.state.component_ids = get_component_ids()
-
+        with get_metrics().timer("stage", stage="retrieve_component_ids"):
+            self.state.component_ids = get_component_ids()
 
     @listen(retrieve_component_ids)
+    def prefetch_configurations(self):
+        if self.state.prefetch_mode == "pipelined":
+            print("Configurations are fetched in the background while components are generated")
+            return
+        print(f"Prefetching configurations of {len(self.state.component_ids)} components")
+        with get_metrics().timer("stage", stage="prefetch_configurations"):
+            stored = get_configuration_cache().store(
+                self.state.component_ids, iter_all_configurations(self.state.component_ids)
+            )
+        print(f"Cached {stored} configuration rows")
+
+    @listen(prefetch_configurations)
     def generate_sample_jsons(self):
-        for component_id in self.state.component_ids:
-            # Check if output file already exists
-            output_file = f"output/sample_data_{component_id}.jsonl"
-            if os.path.exists(output_file):
-                print(f"Skipping {component_id} - output file already exists")
-                continue
-
-            print(f"Generating example JSONs for component ID {component_id}")
-            max_attempts = 5
-            attempt = 1
-            
-            while attempt <= max_attempts:
-                result = (
-                    JsonCrew()
-                    .crew()
-                    .kickoff(inputs={"component_id": component_id, "number_of_samples": 10})
+        install_crew_metrics()
+        with get_metrics().timer("stage", stage="generate_sample_jsons"):
+            if not self.state.profile_path:
+                self.generate_components()
+                return
+
+            # Only the calling thread is profiled, use a concurrency of 1 to profile the crews
+            profiler = cProfile.Profile()
+            profiler.enable()
+            try:
+                self.generate_components()
+            finally:
+                profiler.disable()
+                profiler.dump_stats(self.state.profile_path)
+                print(f"Profile of generate_sample_jsons saved to {self.state.profile_path}")
+
+    def generate_components(self):
+        # Duplicate IDs would make two workers write the same output file
+        component_ids = list(dict.fromkeys(self.state.component_ids))
+        concurrency = max(1, self.state.concurrency)
+
+        if self.state.prefetch_mode == "pipelined":
+            prefetcher = ConfigurationPrefetcher(
+                component_ids, depth=self.state.prefetch_depth, sanitize=self.state.pre_sanitize
+            ).start()
+            try:
+                self.run_components(
+                    lambda component_id: self.process_component(component_id, prefetcher),
+                    component_ids,
+                    1 if self.state.dry_run else concurrency,
                 )
+            finally:
+                prefetcher.stop()
+            return
 
-                # Check if the result is a valid JSONl file
-                print(f"Example JSONs generated (attempt {attempt}/{max_attempts})", result.raw)
-                
-                # Validate the generated JSONL file
-                validation_result = CheckOutputTool()._run(result.raw)
-                if validation_result.startswith("Success"):
-                    print(f"Validation successful for {component_id}")
+        # Regenerate only components whose configurations changed since they were generated
+        pending = {}
+        for component_id in component_ids:
+            reason = self.regeneration_reason(component_id)
+            if reason is None:
+                self.restore_component(component_id)
+            else:
+                pending[component_id] = reason
+        print(f"{len(pending)} of {len(component_ids)} components need to be generated")
+
+        if self.state.dry_run:
+            for component_id, reason in pending.items():
+                print(f"Would regenerate {component_id}: {reason}")
+            return
+
+        self.run_components(self.generate_component, list(pending), concurrency)
+
+    def run_components(self, func, component_ids: list[str], concurrency: int):
+        """Call `func` for each component, in a thread pool if `concurrency` is above one."""
+        if concurrency == 1:
+            for component_id in component_ids:
+                func(component_id)
+            return
+
+        print(f"Generating example JSONs for {len(component_ids)} components, {concurrency} at a time")
+        install_llm_rate_limiter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            futures = {
+                executor.submit(func, component_id): component_id
+                for component_id in component_ids
+            }
+            for future in as_completed(futures):
+                try:
+                    future.result()
+                except Exception as e:
+                    print(f"Error: Generating example JSONs for {futures[future]} failed: {e}")
+
+    def process_component(self, component_id: str, prefetcher: ConfigurationPrefetcher):
+        """Wait for the prefetched configurations of a component, then restore or generate it."""
+        prefetcher.wait(component_id)
+        reason = self.regeneration_reason(component_id)
+        if reason is None:
+            self.restore_component(component_id)
+        elif self.state.dry_run:
+            print(f"Would regenerate {component_id}: {reason}")
+        else:
+            self.generate_component(component_id)
+
+    def regeneration_reason(self, component_id: str):
+        """Return why a component needs to be generated, or None if its output is up to date."""
+        journal = get_run_journal()
+        state = journal.state(component_id)
+        if state["status"] is None:
+            return "not generated yet"
+        if state["failed_runs"]:
+            # Give up on output that keeps failing until the configurations change
+            if state["failed_runs"] < int(os.getenv("SCHEMA_FLOW_MAX_FAILED_RUNS", "3")):
+                return f"output failed validation in {state['failed_runs']} previous run(s)"
+        elif state["status"] not in FINISHED_STATUSES:
+            return "previous run did not finish"
+        return describe_change(journal.get_watermark(component_id), get_component_watermark(component_id))
+
+    def restore_component(self, component_id: str):
+        """Load the output of an up-to-date component from the run journal.
+
+        Output that failed validation is not restored, so it is not saved again.
+        """
+        state = get_run_journal().state(component_id)
+        if state["failed_runs"]:
+            print(f"Skipping {component_id} - failed validation in {state['failed_runs']} runs, "
+                  "configurations did not change")
+            return
+        payload = state["payload"]
+        print(f"Skipping {component_id} - configurations did not change")
+        with self._state_lock:
+            self.state.sample_jsons[component_id] = payload
+            self.state.sample_records[component_id] = validate_jsonl(payload or "").records
+
+    def generate_component(self, component_id: str):
+        metrics = get_metrics()
+        with metrics.labels(component_id=component_id), metrics.timer("component") as event:
+            event["status"], event["attempts"] = self.run_attempts(component_id)
+
+    def run_attempts(self, component_id: str):
+        """Generate and validate a component until the output passes or the attempts run out.
+
+        Returns:
+            tuple: Final status, `validated` or `failed`, and the number of attempts made
+        """
+        # Imported here, so listing components or a dry run does not load the crew
+        from json_schemas.crews.json_crew.json_crew import get_json_crew
+
+        metrics = get_metrics()
+        json_crew = get_json_crew()
+        journal = get_run_journal()
+        journaled = journal.state(component_id)
+        watermark = get_component_watermark(component_id)
+
+        print(f"Generating example JSONs for component ID {component_id}")
+        max_attempts = 5
+        attempt = min(journaled["failed_attempts"], max_attempts - 1) + 1
+
+        inputs = {"component_id": component_id, "number_of_samples": 10}
+        result = None
+        validation_result = ""
+        status, attempts = "failed", 0
+
+        while attempt <= max_attempts:
+            started_at = time.time()
+            journal.record(component_id, "started", attempt, started_at)
+            attempts += 1
+            if result is not None and self.state.retry_mode == "partial":
+                # Keep the upstream task outputs and only regenerate the final JSONL
+                previous = result
+                result = call_with_backoff(lambda: json_crew.retry(inputs, previous, validation_result))
+            else:
+                result = call_with_backoff(lambda: json_crew.kickoff(inputs=inputs))
+
+            if result.token_usage:
+                metrics.record("llm_usage", **result.token_usage)
+
+            # Check if the result is a valid JSONl file
+            print(f"Example JSONs generated for {component_id} (attempt {attempt}/{max_attempts})", result.raw)
+
+            # Validate the generated JSONL and keep the parsed records
+            with metrics.timer("validation", attempt=attempt) as event:
+                validation = validate_jsonl(result.raw)
+                event["valid"] = validation.is_valid
+            validation_result = validation.message
+            if validation.is_valid:
+                print(f"Validation successful for {component_id}")
+                journal.record(component_id, "validated", attempt, started_at, payload=result.raw)
+                journal.save_watermark(component_id, watermark)
+                with self._state_lock:
                     self.state.sample_jsons[component_id] = result.raw
-                    break
-                else:
-                    print(f"Warning: Validation failed for {component_id} (attempt {attempt}/{max_attempts}): {validation_result}")
-                    if attempt == max_attempts:
-                        print(f"Failed to generate valid JSONL for {component_id} after {max_attempts} attempts")
+                    self.state.sample_records[component_id] = validation.records
+                status = "validated"
+                break
+            else:
+                print(f"Warning: Validation failed for {component_id} (attempt {attempt}/{max_attempts}): {validation_result}")
+                journal.record(component_id, "attempt_failed", attempt, started_at, message=validation_result)
+                metrics.record("validation_failure", attempt=attempt, message=validation_result)
+                json_crew.discard(result, all_tasks=self.state.retry_mode == "full")
+                if attempt == max_attempts:
+                    print(f"Failed to generate valid JSONL for {component_id} after {max_attempts} attempts")
+                    journal.record(component_id, "failed", attempt, started_at, payload=result.raw)
+                    journal.save_watermark(component_id, watermark)
+                    with self._state_lock:
                         self.state.sample_jsons[component_id] = result.raw  # Store the last attempt anyway
-                    attempt += 1
-            #break
+                        self.state.sample_records[component_id] = validation.records
+                attempt += 1
+        return status, attempts
 
     @listen(generate_sample_jsons)
     def save_schemas(self):
+        if self.state.dry_run:
+            return
         print("Saving Sample JSONs")
-        for component_id, sample_json in self.state.sample_jsons.items():
-            # Read the JSONL file
-            with open(f"output/sample_data_{component_id}.jsonl", "r") as f:
-                jsonl_content = f.read()
-            
-            # Split into individual JSON objects, skipping code block markers
-            json_objects = []
-            for line in jsonl_content.splitlines():
-                line = line.strip()
-                if line and not (line.startswith("```jsonl") or line.startswith("```")):
-                    try:
-                        json_objects.append(json.loads(line))
-                    except json.JSONDecodeError:
-                        continue
-            
-            # Start building the markdown content
-            markdown_content = f"Below are samples how {component_id} can be configured\n\n"
+        with get_metrics().timer("stage", stage="save_schemas"):
+            for component_id, json_objects in self.state.sample_records.items():
+                # Start building the markdown content
+                markdown_content = f"Below are samples how {component_id} can be configured\n\n"
             
-            # Check if any config_row_example is non-empty
-            has_row_schema = any(obj.get('config_row_example') for obj in json_objects)
-            if has_row_schema:
-                markdown_content += "The component configuration always consists of a configuration and configuration row, you need to create both.\n\n"
+                # Check if any config_row_example is non-empty
+                has_row_schema = any(obj.get('config_row_example') for obj in json_objects)
+                if has_row_schema:
+                    markdown_content += "The component configuration always consists of a configuration and configuration row, you need to create both.\n\n"
             
-            # Add each example
-            for i, obj in enumerate(json_objects, 1):
-                markdown_content += f"Configuration Example {i}\n"
-                markdown_content += "````\n"
-                markdown_content += json.dumps(obj['config_example'], indent=2)
-                markdown_content += "\n```\n\n"
-                
-                if obj.get('config_row_example'):
-                    markdown_content += f"Configuration Row Example {i}\n"
+                # Add each example
+                for i, obj in enumerate(json_objects, 1):
+                    markdown_content += f"Configuration Example {i}\n"
                     markdown_content += "````\n"
-                    markdown_content += json.dumps(obj['config_row_example'], indent=2)
+                    markdown_content += json.dumps(obj['config_example'], indent=2)
                     markdown_content += "\n```\n\n"
+                
+                    if obj.get('config_row_example'):
+                        markdown_content += f"Configuration Row Example {i}\n"
+                        markdown_content += "````\n"
+                        markdown_content += json.dumps(obj['config_row_example'], indent=2)
+                        markdown_content += "\n```\n\n"
             
-            # Save the markdown file
-            with open(f"output/{component_id}.md", "w") as f:
-                f.write(markdown_content)
+                # Save the markdown file
+                with open(f"output/{component_id}.md", "w") as f:
+                    f.write(markdown_content)
+                get_run_journal().record(component_id, "saved")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Generate sample JSON configurations of components.")
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=int(os.getenv("SCHEMA_FLOW_CONCURRENCY", "1")),
+        help="Number of components processed at once (default: SCHEMA_FLOW_CONCURRENCY or 1).",
+    )
+    parser.add_argument(
+        "--retry-mode",
+        choices=["partial", "full"],
+        default=os.getenv("SCHEMA_FLOW_RETRY_MODE", "partial"),
+        help="After a failed validation re-run only the final task (partial) or the whole crew (full).",
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Only list the components that would be regenerated and why.",
+    )
+    parser.add_argument(
+        "--prefetch",
+        choices=["bulk", "pipelined"],
+        default=os.getenv("SCHEMA_FLOW_PREFETCH_MODE", "bulk"),
+        help="Fetch all configurations before generating (bulk) or the next ones while generating (pipelined).",
+    )
+    parser.add_argument(
+        "--prefetch-depth",
+        type=int,
+        default=int(os.getenv("SCHEMA_FLOW_PREFETCH_DEPTH", "2")),
+        help="Number of components fetched ahead in the pipelined mode (default: SCHEMA_FLOW_PREFETCH_DEPTH or 2).",
+    )
+    parser.add_argument(
+        "--pre-sanitize",
+        action="store_true",
+        help="Store only representative, redacted configurations when prefetching in the pipelined mode.",
+    )
+    parser.add_argument(
+        "--profile",
+        default=os.getenv("SCHEMA_FLOW_PROFILE", ""),
+        help="Save a cProfile profile of generate_sample_jsons to this file.",
+    )
+    return parser.parse_args(argv)
 
 
 def kickoff():
+    # Before anything reads the settings, so METRICS_* and SCHEMA_FLOW_* in .env apply
+    load_dotenv()
+    args = parse_args()
     schema_flow = SchemaFlow()
-    schema_flow.kickoff()
+    schema_flow.kickoff(inputs={
+        "concurrency": args.concurrency,
+        "retry_mode": args.retry_mode,
+        "dry_run": args.dry_run,
+        "prefetch_mode": args.prefetch,
+        "prefetch_depth": args.prefetch_depth,
+        "pre_sanitize": args.pre_sanitize,
+        "profile_path": args.profile,
+    })
+    stats = get_pool_stats()
+    print(f"Snowflake connection pool: {stats['hits']} hits, {stats['misses']} misses")
+    metrics = get_metrics()
+    metrics.write_prometheus()
+    metrics.close()
+    print(f"Metrics saved to {metrics.events_path} and {metrics.prometheus_path}")
 
 
 def plot():
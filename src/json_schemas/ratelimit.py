@@ -0,0 +1,105 @@
+import os
+import random
+import threading
+import time
+
+from schemas.metrics import get_metrics
+
+
+class RateLimiter:
+    """Token bucket limiting the number of requests per minute across threads."""
+
+    def __init__(self, requests_per_minute: float):
+        self.rate = requests_per_minute / 60.0
+        self.capacity = max(1.0, requests_per_minute / 60.0)
+        self._tokens = self.capacity
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a request may be made."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+                self._updated_at = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+_installed = False
+
+
+def get_provider(model: str = None) -> str:
+    """Return the LLM provider of a model name such as `openai/gpt-4o`.
+
+    Defaults to the model set in the `MODEL` environment variable.
+    """
+    model = model or os.getenv("MODEL", "")
+    if "/" in model:
+        return model.split("/", 1)[0].lower()
+    return "openai"
+
+
+def get_rate_limiter(provider: str):
+    """Return the shared rate limiter of a provider, or None if it is not limited.
+
+    The limit is read from `LLM_REQUESTS_PER_MINUTE_<PROVIDER>` and falls back
+    to `LLM_REQUESTS_PER_MINUTE`.
+    """
+    with _limiters_lock:
+        if provider not in _limiters:
+            limit = os.getenv(
+                f"LLM_REQUESTS_PER_MINUTE_{provider.upper().replace('-', '_')}",
+                os.getenv("LLM_REQUESTS_PER_MINUTE"),
+            )
+            _limiters[provider] = RateLimiter(float(limit)) if limit else None
+        return _limiters[provider]
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    """Return True if the exception signals that the provider is rate limiting us."""
+    if getattr(error, "status_code", None) == 429:
+        return True
+    return "ratelimit" in type(error).__name__.lower() or "rate limit" in str(error).lower()
+
+
+def call_with_backoff(func, max_retries: int = 5, base_delay: float = 2.0, max_delay: float = 60.0):
+    """Call `func`, retrying with exponential backoff and jitter on rate limit errors."""
+    for retry in range(max_retries + 1):
+        try:
+            return func()
+        except Exception as e:
+            if retry == max_retries or not is_rate_limit_error(e):
+                raise
+            delay = min(max_delay, base_delay * 2 ** retry) * random.uniform(0.5, 1.0)
+            print(f"Rate limited, retrying in {delay:.1f}s ({retry + 1}/{max_retries}): {e}")
+            get_metrics().record("retry", reason="rate_limit", attempt=retry + 1, message=str(e))
+            time.sleep(delay)
+
+
+def install_llm_rate_limiter():
+    """Throttle every LLM call made by crews through the provider rate limiter.
+
+    crewAI emits `LLMCallStartedEvent` synchronously on the calling thread right
+    before the request, so blocking in the handler delays the request itself.
+    """
+    global _installed
+    if _installed:
+        return
+    _installed = True
+
+    from crewai.utilities.events import crewai_event_bus
+    from crewai.utilities.events.llm_events import LLMCallStartedEvent
+
+    @crewai_event_bus.on(LLMCallStartedEvent)
+    def _throttle(source, event):
+        model = getattr(source, "model", None)
+        limiter = get_rate_limiter(get_provider(model if isinstance(model, str) else None))
+        if limiter is not None:
+            limiter.acquire()
@@ -0,0 +1,102 @@
+import json
+from dataclasses import dataclass, field
+
+
+@dataclass(frozen=True)
+class FieldRule:
+    """Check of a single field of a JSONl record."""
+
+    field: str
+    check: object
+    error: str
+
+
+# Rules every record of the generated JSONl must satisfy
+REQUIRED_FIELDS = ("component_id", "config_example", "config_row_example")
+RECORD_RULES = (
+    FieldRule(
+        "component_id",
+        lambda value: isinstance(value, str) and bool(value.strip()),
+        "has invalid component_id. Must be a non-empty string",
+    ),
+    FieldRule(
+        "config_example",
+        lambda value: isinstance(value, dict) and bool(value),
+        "has invalid config_example. Must be a non-empty dictionary",
+    ),
+)
+
+
+@dataclass
+class ValidationResult:
+    """Parsed records and all errors found in JSONl data."""
+
+    records: list[dict] = field(default_factory=list)
+    errors: list[str] = field(default_factory=list)
+
+    @property
+    def is_valid(self) -> bool:
+        return bool(self.records) and not self.errors
+
+    @property
+    def message(self) -> str:
+        if self.is_valid:
+            return "Success: All lines are valid and contain the required fields"
+        if not self.errors:
+            return "Error: No valid JSON lines found in the data"
+        return "Error: " + "\n".join(self.errors)
+
+
+def iter_jsonl_lines(data):
+    """Yield `(line_number, line)` of JSONl content, skipping empty lines and markdown code fences.
+
+    Args:
+        data: JSONl content as a string or an iterable of lines, e.g. an open file.
+    """
+    lines = data.splitlines() if isinstance(data, str) else data
+    for number, line in enumerate(lines, 1):
+        line = line.strip()
+        if line and not line.startswith("```"):
+            yield number, line
+
+
+def validate_jsonl(data, rules=RECORD_RULES) -> ValidationResult:
+    """Parse and validate JSONl content in a single pass.
+
+    Every line is checked, so all invalid lines are reported at once.
+
+    Args:
+        data: JSONl content as a string or an iterable of lines.
+        rules: Field rules each record must satisfy.
+
+    Returns:
+        ValidationResult: Valid records and the errors of invalid lines
+    """
+    result = ValidationResult()
+    if isinstance(data, str) and not data.strip():
+        result.errors.append("Empty JSONl data provided")
+        return result
+
+    for number, line in iter_jsonl_lines(data):
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError:
+            result.errors.append(f"Line {number} is not valid JSON. Line: {line}")
+            continue
+
+        if not isinstance(record, dict):
+            result.errors.append(f"Line {number} is not a JSON object")
+            continue
+        if not all(name in record for name in REQUIRED_FIELDS):
+            result.errors.append(
+                f"Line {number} is missing required fields. Must contain: {', '.join(REQUIRED_FIELDS)}"
+            )
+            continue
+
+        errors = [f"Line {number} {rule.error}" for rule in rules if not rule.check(record[rule.field])]
+        if errors:
+            result.errors.extend(errors)
+        else:
+            result.records.append(record)
+
+    return result
@@ -0,0 +1,134 @@
+import os
+import time
+
+from .store import SQLiteStore, process_singleton
+
+CACHE_COLUMNS = [
+    "config_id", "stack_id", "component_id", "component_type", "config_name", "config_json",
+    "component_listing", "row_id", "config_row_json", "job_id", "job_start_at", "job_status",
+]
+
+
+class ConfigurationCache(SQLiteStore):
+    """Local SQLite cache of component configurations indexed by component ID.
+
+    The cache is filled in one go by `store` and then answers per-component
+    lookups without touching Snowflake, newest job first whatever order the
+    rows were stored in. Components that were prefetched but have
+    no configurations are remembered too, so they are not queried again. Entries
+    fetched more than `max_age` seconds ago are treated as missing.
+    """
+
+    def __init__(self, path: str, max_age: float = None):
+        super().__init__(path)
+        self.max_age = max_age
+        with self._connect() as conn:
+            conn.execute(
+                f"CREATE TABLE IF NOT EXISTS configurations (position INTEGER, {', '.join(CACHE_COLUMNS)})"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS configurations_component_job "
+                "ON configurations (component_id, job_start_at DESC, position)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS components (component_id TEXT PRIMARY KEY, fetched_at REAL)"
+            )
+
+    def store(self, component_ids, rows):
+        """Replace the cached configurations of the given components.
+
+        Rows are written as they are read, so a streamed result is never held in
+        memory as a whole.
+
+        Args:
+            component_ids: Component IDs the rows were fetched for.
+            rows: Rows as dictionaries keyed by column name, in any order.
+
+        Returns:
+            int: Number of rows stored
+        """
+        fetched_at = time.time()
+        stored = 0
+
+        def values():
+            nonlocal stored
+            for row in rows:
+                stored += 1
+                yield (stored, *(row.get(column) for column in CACHE_COLUMNS))
+
+        with self._connect() as conn:
+            conn.executemany(
+                "DELETE FROM configurations WHERE component_id = ?",
+                [(component_id,) for component_id in component_ids],
+            )
+            conn.executemany(
+                f"INSERT INTO configurations VALUES (?, {', '.join('?' for _ in CACHE_COLUMNS)})",
+                values(),
+            )
+            conn.executemany(
+                "INSERT OR REPLACE INTO components VALUES (?, ?)",
+                [(component_id, fetched_at) for component_id in component_ids],
+            )
+        return stored
+
+    def discard(self, component_ids):
+        """Remove the cached configurations of the given components, later lookups go to the source."""
+        with self._connect() as conn:
+            for table in ("configurations", "components"):
+                conn.executemany(
+                    f"DELETE FROM {table} WHERE component_id = ?",
+                    [(component_id,) for component_id in component_ids],
+                )
+
+    def has_component(self, component_id: str) -> bool:
+        """Return True if the component was prefetched into the cache and is not stale."""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT fetched_at FROM components WHERE component_id = ?", (component_id,)
+            ).fetchone()
+        if row is None:
+            return False
+        return self.max_age is None or time.time() - row[0] <= self.max_age
+
+    def iter_configurations(self, component_id: str, skip_config_ids=None):
+        """Stream cached configurations of a component, newest job first.
+
+        Args:
+            component_id: The component ID to get configurations for.
+            skip_config_ids: Configuration IDs to leave out of the result.
+
+        Yields:
+            dict: Row as a dictionary keyed by column name
+        """
+        query = f"SELECT {', '.join(CACHE_COLUMNS)} FROM configurations WHERE component_id = ?"
+        params = [component_id]
+        if skip_config_ids:
+            query += f" AND config_id NOT IN ({', '.join('?' for _ in skip_config_ids)})"
+            params.extend(skip_config_ids)
+        query += " ORDER BY job_start_at DESC, position"
+
+        with self._connect() as conn:
+            for row in conn.execute(query, params):
+                yield dict(zip(CACHE_COLUMNS, row))
+
+    def get_configurations(self, component_id: str, skip_config_ids=None) -> list[dict]:
+        """Return cached configurations of a component, newest job first.
+
+        Returns:
+            list: List of rows as dictionaries keyed by column name
+        """
+        return list(self.iter_configurations(component_id, skip_config_ids))
+
+
+@process_singleton
+def get_configuration_cache() -> ConfigurationCache:
+    """Return the process-wide configuration cache.
+
+    The cache file location is set by `CONFIGURATION_CACHE_PATH`
+    (default `.cache/configurations.sqlite`) and the age after which entries
+    are stale by `CONFIGURATION_CACHE_MAX_AGE` in seconds (default 86400).
+    """
+    return ConfigurationCache(
+        os.getenv("CONFIGURATION_CACHE_PATH", os.path.join(".cache", "configurations.sqlite")),
+        float(os.getenv("CONFIGURATION_CACHE_MAX_AGE", "86400")),
+    )
@@ -1,11 +1,90 @@
 import os
-import snowflake.connector
+import threading
+import time
+from contextlib import contextmanager
+
 from dotenv import load_dotenv
 
+from .store import process_singleton
+
+
+class ConnectionPool:
+    """Thread-safe pool of reusable Snowflake connections.
+
+    Idle connections are kept around for `idle_timeout` seconds and are health
+    checked before they are handed out again. At most `max_size` connections are
+    kept idle, extra connections are closed when they are released.
+    """
+
+    def __init__(self, connect, max_size: int = 4, idle_timeout: float = 300.0):
+        self._connect = connect
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self._idle = []  # list of (connection, released_at)
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "discarded": 0}
+
+    def acquire(self):
+        """Return a healthy idle connection or open a new one."""
+        while True:
+            with self._lock:
+                if not self._idle:
+                    self.stats["misses"] += 1
+                    break
+                conn, released_at = self._idle.pop()
+            if time.monotonic() - released_at <= self.idle_timeout and self._is_healthy(conn):
+                with self._lock:
+                    self.stats["hits"] += 1
+                return conn
+            self._discard(conn)
+        return self._connect()
+
+    def release(self, conn):
+        """Return a connection to the pool, closing it if the pool is full."""
+        if conn.is_closed():
+            return
+        with self._lock:
+            if len(self._idle) < self.max_size:
+                self._idle.append((conn, time.monotonic()))
+                return
+        self._discard(conn)
+
+    def close_all(self):
+        """Close all idle connections."""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn, _ in idle:
+            self._discard(conn)
+
+    def _is_healthy(self, conn) -> bool:
+        if conn.is_closed():
+            return False
+        try:
+            cursor = conn.cursor()
+            try:
+                cursor.execute("SELECT 1")
+            finally:
+                cursor.close()
+            return True
+        except Exception:
+            return False
+
+    def _discard(self, conn):
+        with self._lock:
+            self.stats["discarded"] += 1
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+
 def get_snowflake_connection():
     """Create and return a Snowflake connection using environment variables."""
+    # Imported on first use, the connector is slow to import and not needed by the local source
+    import snowflake.connector
+
     load_dotenv()
-    
+
     conn = snowflake.connector.connect(
         user=os.getenv('SNOWFLAKE_USER'),
         password=os.getenv('SNOWFLAKE_PASSWORD'),
@@ -14,4 +93,35 @@ def get_snowflake_connection():
         database=os.getenv('SNOWFLAKE_DATABASE'),
         schema=os.getenv('SNOWFLAKE_SCHEMA')
     )
-    return conn 
\ No newline at end of file
+    return conn
+
+
+@process_singleton
+def get_connection_pool() -> ConnectionPool:
+    """Return the process-wide connection pool, creating it on first use.
+
+    The pool is configured by `SNOWFLAKE_POOL_MAX_SIZE` (default 4) and
+    `SNOWFLAKE_POOL_IDLE_TIMEOUT` in seconds (default 300).
+    """
+    load_dotenv()
+    return ConnectionPool(
+        get_snowflake_connection,
+        max_size=int(os.getenv('SNOWFLAKE_POOL_MAX_SIZE', '4')),
+        idle_timeout=float(os.getenv('SNOWFLAKE_POOL_IDLE_TIMEOUT', '300')),
+    )
+
+
+@contextmanager
+def snowflake_connection():
+    """Borrow a pooled Snowflake connection for the duration of the block."""
+    pool = get_connection_pool()
+    conn = pool.acquire()
+    try:
+        yield conn
+    finally:
+        pool.release(conn)
+
+
+def get_pool_stats() -> dict:
+    """Return pool hit/miss counters."""
+    return dict(get_connection_pool().stats)
@@ -0,0 +1,156 @@
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+from .store import process_singleton
+
+# Event fields kept only in the JSONl log, neither labels nor summed values
+UNAGGREGATED_FIELDS = ("attempt", "message", "error")
+METRIC_PREFIX = "json_schemas"
+
+
+class Metrics:
+    """Thread-safe recorder of timings and counters of a run.
+
+    Every event is appended to a JSONl log as it happens and aggregated in
+    memory for a Prometheus textfile. String fields of an event become labels,
+    numeric fields are summed. Fields set by `labels` on the current thread are
+    added to all its events, e.g. the component a crew is working on.
+    """
+
+    def __init__(self, events_path: str = None, prometheus_path: str = None):
+        self.events_path = events_path
+        self.prometheus_path = prometheus_path
+        self.run_id = uuid.uuid4().hex[:12]
+        self._totals = {}  # (metric, labels) -> value
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._events_file = None
+        if events_path:
+            directory = os.path.dirname(events_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._events_file = open(events_path, "a", encoding="utf-8")
+
+    @contextmanager
+    def labels(self, **labels):
+        """Add fields to all events recorded on the current thread within the block."""
+        previous = getattr(self._local, "labels", {})
+        self._local.labels = {**previous, **labels}
+        try:
+            yield
+        finally:
+            self._local.labels = previous
+
+    def record(self, kind: str, duration: float = None, **fields):
+        """Record an event.
+
+        Args:
+            kind: Kind of the event, e.g. `tool` or `snowflake_query`.
+            duration: Wall time in seconds, if the event is timed.
+            fields: Labels and values of the event.
+        """
+        fields = {**getattr(self._local, "labels", {}), **fields}
+        event = {"ts": time.time(), "run_id": self.run_id, "kind": kind}
+        if duration is not None:
+            event["duration"] = round(duration, 6)
+        event.update(fields)
+
+        labels = tuple(sorted(
+            (key, str(value)) for key, value in fields.items()
+            if key not in UNAGGREGATED_FIELDS and not _is_number(value) and value is not None
+        ))
+        values = {"total": 1}
+        if duration is not None:
+            values["seconds_total"] = duration
+        for key, value in fields.items():
+            if key not in UNAGGREGATED_FIELDS and _is_number(value):
+                values[f"{key}_total"] = value
+
+        line = json.dumps(event, default=str)
+        with self._lock:
+            for name, value in values.items():
+                key = (f"{METRIC_PREFIX}_{kind}_{name}", labels)
+                self._totals[key] = self._totals.get(key, 0) + value
+            if self._events_file is not None:
+                self._events_file.write(line + "\n")
+                self._events_file.flush()
+
+    @contextmanager
+    def timer(self, kind: str, **fields):
+        """Time the block and record it as an event.
+
+        Yields:
+            dict: Fields of the event, the block may add more such as the number of rows
+        """
+        fields = dict(fields)
+        started_at = time.perf_counter()
+        try:
+            yield fields
+        except BaseException as e:
+            fields.setdefault("status", "error")
+            fields.setdefault("error", str(e))
+            raise
+        finally:
+            self.record(kind, time.perf_counter() - started_at, **fields)
+
+    def totals(self) -> dict:
+        """Return the aggregated values keyed by `(metric, labels)`."""
+        with self._lock:
+            return dict(self._totals)
+
+    def write_prometheus(self, path: str = None):
+        """Write the aggregated values in the Prometheus text format.
+
+        The file is replaced atomically, so it can be read by the node exporter
+        textfile collector at any time.
+        """
+        path = path or self.prometheus_path
+        if not path:
+            return
+        lines = []
+        for (metric, labels), value in sorted(self.totals().items()):
+            if labels:
+                rendered = ",".join(f'{key}="{_escape_label(value)}"' for key, value in labels)
+                lines.append(f"{metric}{{{rendered}}} {value}")
+            else:
+                lines.append(f"{metric} {value}")
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with open(temporary, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(temporary, path)
+
+    def close(self):
+        with self._lock:
+            if self._events_file is not None:
+                self._events_file.close()
+                self._events_file = None
+
+
+def _is_number(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+@process_singleton
+def get_metrics() -> Metrics:
+    """Return the process-wide metrics recorder.
+
+    Events are appended to `METRICS_PATH` (default `output/metrics.jsonl`) and
+    the Prometheus textfile is written to `METRICS_PROMETHEUS_PATH` (default
+    `output/metrics.prom`). Setting either to an empty value disables it.
+    """
+    return Metrics(
+        os.getenv("METRICS_PATH", os.path.join("output", "metrics.jsonl")),
+        os.getenv("METRICS_PROMETHEUS_PATH", os.path.join("output", "metrics.prom")),
+    )
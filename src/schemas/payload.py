@@ -0,0 +1,208 @@
+import functools
+import json
+import os
+
+from .cache import get_configuration_cache
+from .processor import iter_configurations
+from .redaction import redact_configuration
+from .selection import select_representatives
+
+MAX_PAYLOAD_SIZE = 100000  # Maximum allowed JSON size
+
+
+def _list_item_size(item) -> int:
+    """Return the length `item` takes up as an element of a list dumped with indent=2.
+
+    Nesting the item inside the list adds two spaces of indentation to every line
+    of its own `json.dumps(item, indent=2)` output.
+    """
+    text = json.dumps(item, indent=2)
+    return len(text) + 2 * text.count("\n") + 2
+
+
+def parse_configuration(config: dict) -> dict:
+    """Convert a configuration row into the structure returned to the agents."""
+    result = {}
+
+    # Convert JSON strings to Python dictionaries
+    if config['config_json']:
+        result['config_json'] = json.loads(config['config_json'])
+    else:
+        result['config_json'] = {}
+
+    if config['config_row_json']:
+        result['config_row_json'] = json.loads(config['config_row_json'])
+    else:
+        result['config_row_json'] = {}
+
+    # Format datetime to ISO format
+    if config['job_start_at']:
+        # The timestamp is already in ISO format with timezone
+        # Just ensure it's properly formatted
+        result['job_start_at'] = config['job_start_at'].replace('Z', '+00:00')
+
+    return result
+
+
+def format_configurations(rows, max_size: int = MAX_PAYLOAD_SIZE, transform=None):
+    """Serialize configuration rows as indented JSON limited to `max_size` characters.
+
+    Rows are consumed lazily and reading stops as soon as the next row would not
+    fit, so the caller can stop fetching from the source. The size of the output
+    is tracked incrementally instead of re-serializing the whole list per row.
+
+    Args:
+        rows: Iterable of rows as dictionaries keyed by column name.
+        max_size: Maximum length of the returned JSON string.
+        transform: Optional function applied to each parsed configuration, e.g. redaction.
+
+    Returns:
+        str: The JSON payload, or None if `rows` was empty
+    """
+    configs = []
+    # Size of the serialized list: "[\n" + items joined by ",\n" + "\n]"
+    size = 4
+    empty = True
+
+    for config in rows:
+        empty = False
+        result = parse_configuration(config)
+        if transform is not None:
+            result = transform(result)
+
+        item_size = _list_item_size(result)
+        new_size = size + item_size + (2 if configs else 0)
+
+        # If we exceed the size limit, stop without adding the config
+        if new_size > max_size:
+            break
+        configs.append(result)
+        size = new_size
+
+    if empty:
+        return None
+    return json.dumps(configs, indent=2)
+
+
+DEFAULT_TOKEN_BUDGET = 25000  # Estimated tokens of a compact payload
+CHARS_PER_TOKEN = 4  # Rough ratio for JSON when no tokenizer is available
+
+
+@functools.lru_cache(maxsize=None)
+def get_token_counter(model: str = None):
+    """Return a function estimating the number of tokens of a text for a model.
+
+    Uses tiktoken when it is installed and knows the model, otherwise assumes
+    `CHARS_PER_TOKEN` characters per token. tiktoken downloads the encoding on
+    first use, a failed download falls back to the estimate too. The counter is
+    resolved once per model and process.
+    """
+    try:
+        import tiktoken
+
+        encoding = tiktoken.encoding_for_model((model or "").split("/")[-1])
+    except (ImportError, KeyError):
+        return _estimate_tokens
+    except Exception as e:
+        print(f"Warning: Loading the tokenizer of {model} failed, estimating tokens from characters: {e}")
+        return _estimate_tokens
+    return lambda text: len(encoding.encode(text))
+
+
+def _estimate_tokens(text: str) -> int:
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+def group_configurations(rows):
+    """Group rows of the same configuration so its `config_json` is included once.
+
+    Rows of a configuration share its latest job, so they are grouped within each
+    run of rows with the same `job_start_at`. The input is consumed lazily.
+
+    Yields:
+        dict: Configuration with its `config_id`, `config_json`, `job_start_at` and list of `rows`
+    """
+    groups = {}
+    job_start_at = None
+    for config in rows:
+        if groups and config['job_start_at'] != job_start_at:
+            yield from groups.values()
+            groups = {}
+        job_start_at = config['job_start_at']
+
+        parsed = parse_configuration(config)
+        group = groups.get(config['config_id'])
+        if group is None:
+            group = groups[config['config_id']] = {
+                'config_id': config['config_id'],
+                'config_json': parsed['config_json'],
+            }
+            if 'job_start_at' in parsed:
+                group['job_start_at'] = parsed['job_start_at']
+            group['rows'] = []
+        if parsed['config_row_json']:
+            group['rows'].append(parsed['config_row_json'])
+    yield from groups.values()
+
+
+def format_compact_configurations(rows, token_budget: int = DEFAULT_TOKEN_BUDGET, model: str = None,
+                                  transform=None):
+    """Serialize configurations as minified JSON grouped by configuration, limited by tokens.
+
+    Args:
+        rows: Iterable of rows as dictionaries keyed by column name.
+        token_budget: Maximum estimated number of tokens of the returned JSON.
+        model: Model name used to pick the tokenizer.
+        transform: Optional function applied to each grouped configuration, e.g. redaction.
+
+    Returns:
+        str: The JSON payload, or None if `rows` was empty
+    """
+    count_tokens = get_token_counter(model)
+    configs = []
+    tokens = 1  # Brackets of the list
+    empty = True
+
+    for group in group_configurations(rows):
+        empty = False
+        if transform is not None:
+            group = transform(group)
+
+        # One more token for the separating comma
+        new_tokens = tokens + count_tokens(json.dumps(group, separators=(',', ':'))) + 1
+        if new_tokens > token_budget:
+            break
+        configs.append(group)
+        tokens = new_tokens
+
+    if empty:
+        return None
+    return json.dumps(configs, separators=(',', ':'))
+
+
+def get_configurations_payload(component_id: str, skip_config_ids=None):
+    """Return the configurations of a component exactly as `GetConfigurationsTool` shows them.
+
+    Rows come from the prefetched cache or stream from the source. One
+    representative per configuration structure is kept, test configurations
+    are dropped and secrets replaced before anything reaches the agents.
+    `CONFIGURATIONS_PAYLOAD_MODE` selects the `pretty` (default) or `compact` format.
+
+    Returns:
+        str: The JSON payload, or None if the component has no configurations
+    """
+    cache = get_configuration_cache()
+    if cache.has_component(component_id):
+        results = cache.iter_configurations(component_id, skip_config_ids)
+    else:
+        results = iter_configurations([component_id], skip_config_ids)
+
+    results = select_representatives(results)
+    if os.getenv("CONFIGURATIONS_PAYLOAD_MODE", "pretty") == "compact":
+        return format_compact_configurations(
+            results,
+            token_budget=int(os.getenv("CONFIGURATIONS_TOKEN_BUDGET", str(DEFAULT_TOKEN_BUDGET))),
+            model=os.getenv("MODEL"),
+            transform=redact_configuration,
+        )
+    return format_configurations(results, transform=redact_configuration)
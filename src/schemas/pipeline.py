@@ -0,0 +1,121 @@
+import threading
+from collections import deque
+
+from .cache import get_configuration_cache
+from .metrics import get_metrics
+from .redaction import redact_row
+from .selection import select_representatives
+from .sources import get_configuration_source
+
+
+class ConfigurationPrefetcher:
+    """Background stage fetching configurations of upcoming components into the cache.
+
+    Queries of up to `depth` components past the one the consumer is working on
+    are submitted to the source at once, with Snowflake as asynchronous queries,
+    and their results are stored in the configuration cache in order. By the time
+    the consumer gets to a component, `GetConfigurationsTool` finds its rows ready.
+    When a fetch fails, or the stage stops before reaching a component, the
+    component is removed from the cache, so rows cached by an earlier run are
+    not mistaken for fresh ones and the tool queries the source itself.
+
+    With `sanitize` only representative configurations are stored and secrets are
+    replaced before the rows reach the cache. Watermarks are then computed from
+    the sanitized rows, so switching the option regenerates the components once.
+    """
+
+    def __init__(self, component_ids, depth: int = 2, sanitize: bool = False):
+        self.component_ids = list(dict.fromkeys(component_ids))
+        self.depth = max(1, depth)
+        self.sanitize = sanitize
+        self._positions = {component_id: i for i, component_id in enumerate(self.component_ids)}
+        self._ready = {component_id: threading.Event() for component_id in self.component_ids}
+        self._errors = {}
+        self._consumed = 0  # Number of components the consumer has reached
+        self._stopped = False
+        self._condition = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="configuration-prefetch", daemon=True)
+
+    def start(self) -> "ConfigurationPrefetcher":
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop submitting queries and wait for the current fetch to finish."""
+        with self._condition:
+            self._stopped = True
+            self._condition.notify_all()
+        self._thread.join()
+
+    def wait(self, component_id: str):
+        """Block until the configurations of a component are cached and move the window forward.
+
+        If the fetch failed, the error is reported. The component is no longer
+        cached then, so the tool falls back to querying the source itself.
+        """
+        position = self._positions.get(component_id)
+        if position is None:
+            return
+        with self._condition:
+            self._consumed = max(self._consumed, position + 1)
+            self._condition.notify_all()
+        self._ready[component_id].wait()
+        if component_id in self._errors:
+            print(f"Warning: Prefetching configurations of {component_id} failed: {self._errors[component_id]}")
+
+    def _run(self):
+        try:
+            self._prefetch()
+        except Exception as e:
+            print(f"Warning: Prefetching configurations stopped: {e}")
+        finally:
+            # Never leave the consumer waiting, it falls back to querying the source
+            for component_id, event in self._ready.items():
+                if not event.is_set():
+                    self._fail(component_id, RuntimeError("prefetching stopped"))
+
+    def _prefetch(self):
+        source = get_configuration_source()
+        cache = get_configuration_cache()
+        submitted = deque()  # (component_id, fetch)
+        next_position = 0
+
+        while True:
+            with self._condition:
+                while not self._stopped and not submitted and next_position >= self._window_end():
+                    self._condition.wait()
+                if self._stopped:
+                    return
+                window_end = self._window_end()
+
+            while next_position < window_end:
+                component_id = self.component_ids[next_position]
+                next_position += 1
+                try:
+                    submitted.append((component_id, source.submit_configurations([component_id])))
+                except Exception as e:
+                    self._fail(component_id, e)
+
+            if submitted:
+                component_id, fetch = submitted.popleft()
+                try:
+                    with get_metrics().labels(component_id=component_id):
+                        rows = fetch()
+                        if self.sanitize:
+                            rows = (redact_row(row) for row in select_representatives(rows))
+                        cache.store([component_id], list(rows))
+                    self._ready[component_id].set()
+                except Exception as e:
+                    self._fail(component_id, e)
+
+    def _window_end(self) -> int:
+        return min(len(self.component_ids), self._consumed + self.depth)
+
+    def _fail(self, component_id: str, error: Exception):
+        self._errors[component_id] = error
+        try:
+            get_configuration_cache().discard([component_id])
+        except Exception as e:
+            print(f"Warning: Removing configurations of {component_id} from the cache failed: {e}")
+        finally:
+            self._ready[component_id].set()
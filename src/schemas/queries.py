@@ -0,0 +1,127 @@
+# Stacks the configurations are taken from
+STACK_IDS = [
+    'com-keboola-azure-north-europe', 'kbc-eu-central-1', 'com-keboola-gcp-europe-west3',
+    'com-keboola-gcp-us-east4', 'kbc-us-east-1',
+]
+
+# Components that are not worth generating sample configurations for
+EXCLUDED_COMPONENT_IDS = [
+    'keboola.snowflake-transformation', 'keboola.python-transformation-v2', 'keboola.legacy-transformation',
+    'keboola.synapse-transformation', 'keboola.google-bigquery-transformation', 'keboola.python-transformation',
+    'keboola.r-transformation-v2', 'keboola.no-code-dbt-transformation', 'keboola.csas-python-transformation-v2',
+    'transformation', 'keboola.oracle-transformation', 'keboola.python-snowpark-transformation', 'keboola.exasol-transformation',
+    'kds-team.app-custom-python',
+    'keboola.sandboxes', 'keboola.variables', 'keboola.data-apps', 'keboola.shared-code',
+    'keboola.runner-config-test', 'keboola.runner-workspace-bigquery-test',
+    'keboola.runner-workspace-test', 'keboola.project-migration-tool', 'dca-custom-science-python', 'docker-demo',
+]
+EXCLUDED_COMPONENT_TYPES = ['other', 'transformation', 'data-app']
+EXCLUDED_COMPONENT_PREFIX = 'keboola-test'
+
+
+def _sql_list(values) -> str:
+    return ", ".join(f"'{value}'" for value in values)
+
+
+# The latest job of each configuration is not joined in Snowflake, it is looked up
+# in the local snapshot maintained by `schemas.snapshot`
+COMPONENT_CONFIGURATIONS_QUERY = f"""
+    SELECT "config_id", "component_id", "component_listing", "component_origin" FROM (
+        SELECT 
+            "cc"."kbc_component_configuration_id" AS "config_id",
+            SPLIT_PART("cc"."kbc_project_id", '_', 2) AS "stack_id",
+            REPLACE(
+                "cc"."kbc_component_id", 
+                '_' || SPLIT_PART("cc"."kbc_project_id", '_', 2), 
+                '') 
+            AS "component_id",
+            "cc"."kbc_component_type" AS "component_type",
+            "cc"."configuration_json" AS "config_json",
+            "kc"."kbc_component_listing" AS "component_listing",
+            "kc"."kbc_component_origin" AS "component_origin"
+        FROM "kbc_component_configuration" AS "cc"
+            LEFT JOIN "kbc_component" AS "kc"
+                ON "cc"."kbc_component_id" = "kc"."kbc_component_id"
+        WHERE
+            --"kbc_configuration_is_deleted" = "true" AND
+            "config_json" != '{{}}' AND
+            "config_json" != '' AND
+            "component_id" NOT IN ({_sql_list(EXCLUDED_COMPONENT_IDS)}) AND
+            "component_type" NOT IN ({_sql_list(EXCLUDED_COMPONENT_TYPES)}) AND
+            "component_id" NOT ILIKE '{EXCLUDED_COMPONENT_PREFIX}%' AND
+            "stack_id" IN ({_sql_list(STACK_IDS)}) AND
+            1=1
+    ) AS "sub"
+    """
+
+_CONFIGURATIONS_SELECT = f"""
+    SELECT 
+        "cc"."kbc_component_configuration_id" AS "config_id",
+        SPLIT_PART("cc"."kbc_project_id", '_', 2) AS "stack_id",
+        REPLACE(
+            "cc"."kbc_component_id", 
+            '_' || SPLIT_PART("cc"."kbc_project_id", '_', 2), 
+            '') 
+        AS "component_id",
+        "cc"."kbc_component_type" AS "component_type",
+        "cc"."kbc_component_configuration" AS "config_name",
+        "cc"."configuration_json" AS "config_json",
+        "kc"."kbc_component_listing" AS "component_listing",
+        "crw"."kbc_component_configuration_row_id" AS "row_id",
+        "crw"."configuration_row_json" AS "config_row_json"
+    FROM "kbc_component_configuration" AS "cc"
+        LEFT JOIN "kbc_component_configuration_row" AS "crw"
+            ON "cc"."kbc_component_configuration_id" =
+                "crw"."kbc_component_configuration_id"
+        LEFT JOIN "kbc_component" AS "kc"
+            ON "cc"."kbc_component_id" = "kc"."kbc_component_id"
+    WHERE
+        "config_json" != '{{}}' AND
+        "config_json" != '' AND
+        "stack_id" IN ({_sql_list(STACK_IDS)}) AND
+    """
+
+
+# All configurations and rows of the given components
+CONFIGURATIONS_QUERY = _CONFIGURATIONS_SELECT + """    "component_id" IN %s
+    """
+
+# Configurations and rows of the given configuration IDs
+CONFIGURATION_DETAILS_QUERY = _CONFIGURATIONS_SELECT + """    "config_id" IN %s
+    """
+
+# IDs of the configurations of the given components, without the wide JSON columns
+CONFIGURATION_IDS_QUERY = f"""
+    SELECT DISTINCT "config_id" FROM (
+        SELECT
+            "cc"."kbc_component_configuration_id" AS "config_id",
+            SPLIT_PART("cc"."kbc_project_id", '_', 2) AS "stack_id",
+            REPLACE(
+                "cc"."kbc_component_id", 
+                '_' || SPLIT_PART("cc"."kbc_project_id", '_', 2), 
+                '') 
+            AS "component_id",
+            "cc"."configuration_json" AS "config_json"
+        FROM "kbc_component_configuration" AS "cc"
+        WHERE
+            "config_json" != '{{}}' AND
+            "config_json" != '' AND
+            "stack_id" IN ({_sql_list(STACK_IDS)}) AND
+            "component_id" IN %s
+    ) AS "sub"
+    """
+
+# Latest job of every configuration, optionally only of jobs started since a watermark
+LATEST_JOBS_QUERY = """
+    SELECT
+        "kbc_component_configuration_id" AS "config_id",
+        "kbc_job_id" AS "job_id",
+        "job_start_at",
+        "job_status"
+    FROM "kbc_job"
+    {where}
+    QUALIFY ROW_NUMBER() OVER (
+        PARTITION BY "kbc_component_configuration_id"
+        ORDER BY "job_start_at" DESC
+    ) = 1
+    """
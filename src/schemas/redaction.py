@@ -0,0 +1,81 @@
+import json
+import re
+
+SECRET_PLACEHOLDER = "<secret>"
+REDACTED_PLACEHOLDER = "<redacted>"
+
+# Key names holding credentials, compared lowercase without "_", "-" and "."
+CREDENTIAL_KEYS = frozenset([
+    "password", "passwd", "pwd", "pass", "secret", "clientsecret", "appsecret", "secretkey",
+    "secretaccesskey", "awssecretaccesskey", "token", "accesstoken", "refreshtoken", "authtoken",
+    "apitoken", "bearertoken", "sessiontoken", "apikey", "apisecret", "privatekey", "sshkey",
+    "sshprivatekey", "certificate", "clientcertificate", "cert", "credentials", "authorization",
+])
+
+# Detectors of secrets embedded in string values, combined into a single pattern
+SECRET_PATTERN = re.compile(
+    "|".join([
+        r"-----BEGIN [A-Z0-9 ]+-----.*?-----END [A-Z0-9 ]+-----",  # PEM blocks
+        r"\beyJ[A-Za-z0-9_-]{8,}\.eyJ[A-Za-z0-9_-]{8,}\.[A-Za-z0-9_-]+",  # JWT
+        r"\b(?:AKIA|ASIA)[0-9A-Z]{16}\b",  # AWS access key ID
+        r"\bgh[pousr]_[A-Za-z0-9]{36,}\b",  # GitHub token
+        r"\bxox[abposr]-[A-Za-z0-9-]{10,}",  # Slack token
+        r"\bAIza[0-9A-Za-z_-]{35}\b",  # Google API key
+        r"\bsk-[A-Za-z0-9_-]{20,}\b",  # OpenAI style secret key
+        r"\b\d+-\d+-[A-Za-z0-9]{40}\b",  # Keboola Storage API token
+        r"\bBearer\s+[A-Za-z0-9._~+/-]{16,}=*",  # Bearer authorization header
+    ]),
+    re.DOTALL,
+)
+
+_KEY_TRANSLATION = str.maketrans("", "", "_-.")
+
+
+def _is_credential_key(key: str) -> bool:
+    return key.lower().translate(_KEY_TRANSLATION) in CREDENTIAL_KEYS
+
+
+def _is_scalar_secret(item) -> bool:
+    return isinstance(item, (str, int, float)) and not isinstance(item, bool) and item != ""
+
+
+def redact(value, under_credential: bool = False):
+    """Return a copy of a parsed JSON value with secrets replaced.
+
+    Values of keys starting with `#` become `<secret>`, scalars under known
+    credential keys become `<redacted>`, also inside nested lists and objects,
+    and secrets detected inside other strings are replaced by `<redacted>`.
+    The tree is walked once.
+    """
+    if isinstance(value, dict):
+        result = {}
+        for key, item in value.items():
+            if key.startswith("#"):
+                result[key] = SECRET_PLACEHOLDER
+            else:
+                result[key] = redact(item, under_credential or _is_credential_key(key))
+        return result
+    if isinstance(value, list):
+        return [redact(item, under_credential) for item in value]
+    if under_credential and _is_scalar_secret(value):
+        return REDACTED_PLACEHOLDER
+    if isinstance(value, str):
+        return SECRET_PATTERN.sub(REDACTED_PLACEHOLDER, value)
+    return value
+
+
+def redact_configuration(config: dict) -> dict:
+    """Redact secrets in a configuration returned to the agents, plain or grouped with its rows."""
+    return {
+        key: redact(value) if key in ("config_json", "config_row_json", "rows") else value
+        for key, value in config.items()
+    }
+
+
+def redact_row(row: dict) -> dict:
+    """Return a copy of a source row with secrets replaced in its unparsed JSON columns."""
+    row = dict(row)
+    for key in ("config_json", "config_row_json"):
+        if row.get(key):
+            row[key] = json.dumps(redact(json.loads(row[key])))
+    return row
@@ -0,0 +1,68 @@
+import hashlib
+import json
+import re
+
+# Names of configurations that only exist to test the component, e.g. "test",
+# "public-api-test", "my dummy config" or "testMatcherInvalidConfiguration". Only a
+# whole lowercase token, a camelCase prefix or a name that is nothing but "Test"
+# counts, so names such as "Test results export" or "A/B Testing events" are kept.
+TEST_NAME_PATTERN = re.compile(
+    r"(?i:^\s*(?:test|dummy)[\s\d_-]*$)"
+    r"|(?<![A-Za-z0-9])(?:test|dummy)(?![A-Za-z0-9])"
+    r"|(?<![A-Za-z0-9])test(?=[A-Z])"
+)
+
+
+def key_paths(value, prefix: str = "") -> set[str]:
+    """Return the set of key paths of a parsed JSON value.
+
+    Items of a list share the `[]` path segment, so lists differing only in
+    length have the same paths.
+    """
+    paths = set()
+    if isinstance(value, dict):
+        for key, item in value.items():
+            path = f"{prefix}.{key}"
+            paths.add(path)
+            paths |= key_paths(item, path)
+    elif isinstance(value, list):
+        for item in value:
+            paths |= key_paths(item, f"{prefix}[]")
+    return paths
+
+
+def structure_fingerprint(config_json: str, config_row_json: str) -> str:
+    """Return a hash of the key structure of a configuration and its row."""
+    paths = key_paths(json.loads(config_json) if config_json else {}, "config")
+    paths |= key_paths(json.loads(config_row_json) if config_row_json else {}, "row")
+    return hashlib.sha1("\n".join(sorted(paths)).encode("utf-8")).hexdigest()
+
+
+def is_test_configuration(config_name) -> bool:
+    """Return True if the configuration name suggests it only exists for testing."""
+    return bool(config_name) and TEST_NAME_PATTERN.search(config_name) is not None
+
+
+def select_representatives(rows):
+    """Drop test configurations and keep one row per configuration structure.
+
+    Rows with the same key structure form a cluster, the first row of each
+    cluster is kept. Rows are expected newest job first, so the representative
+    is the configuration with the newest `job_start_at`. The input is consumed
+    lazily.
+
+    Args:
+        rows: Iterable of rows as dictionaries keyed by column name.
+
+    Yields:
+        dict: Representative rows in input order
+    """
+    seen = set()
+    for row in rows:
+        if is_test_configuration(row.get("config_name")):
+            continue
+        fingerprint = structure_fingerprint(row["config_json"], row["config_row_json"])
+        if fingerprint in seen:
+            continue
+        seen.add(fingerprint)
+        yield row
@@ -0,0 +1,138 @@
+import os
+import time
+
+from .db import snowflake_connection
+from .metrics import get_metrics
+from .queries import LATEST_JOBS_QUERY
+from .store import SQLiteStore, process_singleton
+
+# Maximum number of SQLite variables in a single lookup
+LOOKUP_CHUNK_SIZE = 900
+
+# Statuses of jobs that will not change any more, other jobs are pulled again on refresh
+FINAL_JOB_STATUSES = ("success", "error", "warning", "terminated", "cancelled")
+
+
+class LatestJobSnapshot(SQLiteStore):
+    """Local SQLite snapshot of the latest job of every configuration.
+
+    The first refresh loads the latest job of every configuration. Later
+    refreshes only pull jobs started at or after the newest `job_start_at`
+    already in the snapshot minus `lookback` seconds, so the cost does not grow
+    with the job history while rows arriving late in the warehouse are still
+    picked up. Configurations whose stored job had not finished yet are pulled
+    again by ID, whenever their job started.
+    """
+
+    def __init__(self, path: str, lookback: int = 86400):
+        super().__init__(path)
+        self.lookback = lookback
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS latest_jobs ("
+                "config_id TEXT PRIMARY KEY, job_id TEXT, job_start_at TEXT, job_status TEXT)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS latest_jobs_start ON latest_jobs (job_start_at)")
+
+    def watermark(self):
+        """Return the newest `job_start_at` in the snapshot, or None if it is empty."""
+        with self._connect() as conn:
+            return conn.execute("SELECT MAX(job_start_at) FROM latest_jobs").fetchone()[0]
+
+    def refresh(self, batch_size: int = 10000) -> int:
+        """Pull jobs newer than the watermark and jobs of unfinished configurations from Snowflake.
+
+        Upserting a job pulled again is idempotent.
+
+        Returns:
+            int: Number of jobs pulled
+        """
+        watermark = self.watermark()
+        if watermark is None:
+            return self._pull(LATEST_JOBS_QUERY.format(where=""), None, batch_size)
+
+        pulled = self._pull(
+            LATEST_JOBS_QUERY.format(where='WHERE "job_start_at" >= DATEADD(second, -%s, %s::TIMESTAMP_TZ)'),
+            (self.lookback, watermark),
+            batch_size,
+        )
+        unfinished = self.unfinished_config_ids()
+        query = LATEST_JOBS_QUERY.format(where='WHERE "kbc_component_configuration_id" IN %s')
+        for start in range(0, len(unfinished), batch_size):
+            pulled += self._pull(query, (tuple(unfinished[start:start + batch_size]),), batch_size)
+        return pulled
+
+    def _pull(self, query: str, params, batch_size: int) -> int:
+        pulled = 0
+        with snowflake_connection() as sf_conn:
+            cursor = sf_conn.cursor()
+            try:
+                with get_metrics().timer("snowflake_query", query="latest_jobs") as event, self._connect() as conn:
+                    cursor.execute(query, params)
+                    while True:
+                        rows = cursor.fetchmany(batch_size)
+                        if not rows:
+                            break
+                        conn.executemany(
+                            "INSERT INTO latest_jobs VALUES (?, ?, ?, ?) "
+                            "ON CONFLICT (config_id) DO UPDATE SET "
+                            "job_id = excluded.job_id, job_start_at = excluded.job_start_at, "
+                            "job_status = excluded.job_status "
+                            "WHERE excluded.job_start_at >= latest_jobs.job_start_at",
+                            [tuple(str(value) if value is not None else None for value in row) for row in rows],
+                        )
+                        pulled += len(rows)
+                    event["rows"] = pulled
+            finally:
+                cursor.close()
+        return pulled
+
+    def unfinished_config_ids(self) -> list[str]:
+        """Return IDs of configurations whose stored latest job had not finished when it was pulled."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT config_id FROM latest_jobs "
+                f"WHERE job_status IS NULL OR job_status NOT IN ({', '.join('?' for _ in FINAL_JOB_STATUSES)})",
+                FINAL_JOB_STATUSES,
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def successful_config_ids(self) -> set[str]:
+        """Return IDs of configurations whose latest job succeeded."""
+        with self._connect() as conn:
+            rows = conn.execute("SELECT config_id FROM latest_jobs WHERE job_status = 'success'").fetchall()
+        return {row[0] for row in rows}
+
+    def get_jobs(self, config_ids) -> dict[str, dict]:
+        """Return the latest jobs of the given configurations keyed by configuration ID."""
+        config_ids = list(config_ids)
+        jobs = {}
+        with self._connect() as conn:
+            for start in range(0, len(config_ids), LOOKUP_CHUNK_SIZE):
+                chunk = config_ids[start:start + LOOKUP_CHUNK_SIZE]
+                rows = conn.execute(
+                    "SELECT config_id, job_id, job_start_at, job_status FROM latest_jobs "
+                    f"WHERE config_id IN ({', '.join('?' for _ in chunk)})",
+                    chunk,
+                ).fetchall()
+                for config_id, job_id, job_start_at, job_status in rows:
+                    jobs[config_id] = {"job_id": job_id, "job_start_at": job_start_at, "job_status": job_status}
+        return jobs
+
+
+@process_singleton
+def get_latest_job_snapshot() -> LatestJobSnapshot:
+    """Return the process-wide latest job snapshot, refreshed on first use.
+
+    The snapshot file is set by `LATEST_JOB_SNAPSHOT_PATH`
+    (default `.cache/latest_jobs.sqlite`), the window of late-arriving jobs
+    by `LATEST_JOB_SNAPSHOT_LOOKBACK` in seconds (default one day).
+    """
+    snapshot = LatestJobSnapshot(
+        os.getenv("LATEST_JOB_SNAPSHOT_PATH", os.path.join(".cache", "latest_jobs.sqlite")),
+        lookback=int(os.getenv("LATEST_JOB_SNAPSHOT_LOOKBACK", "86400")),
+    )
+    started_at = time.monotonic()
+    pulled = snapshot.refresh()
+    print(f"Refreshed latest job snapshot with {pulled} jobs in {time.monotonic() - started_at:.1f}s")
+    return snapshot
@@ -0,0 +1,436 @@
+import csv
+import importlib.util
+import os
+import threading
+from abc import ABC, abstractmethod
+
+from dotenv import load_dotenv
+
+from .metrics import get_metrics
+from .queries import (
+    COMPONENT_CONFIGURATIONS_QUERY,
+    CONFIGURATION_DETAILS_QUERY,
+    CONFIGURATION_IDS_QUERY,
+    CONFIGURATIONS_QUERY,
+    EXCLUDED_COMPONENT_IDS,
+    EXCLUDED_COMPONENT_PREFIX,
+    EXCLUDED_COMPONENT_TYPES,
+    STACK_IDS,
+)
+from .store import process_singleton
+
+
+# Configurations in the first chunk of details, the chunks double up to the batch size
+FIRST_DETAILS_CHUNK_SIZE = 25
+
+
+def order_component_ids(components: dict) -> list[str]:
+    """Order component IDs by origin and listing descending, then by ID.
+
+    Args:
+        components: Component IDs keyed by `(component_id, component_listing, component_origin)`.
+    """
+    keys = sorted(components, key=lambda key: key[0])
+    keys.sort(key=lambda key: (key[2], key[1]), reverse=True)
+    return [components[key] for key in keys]
+
+
+class ConfigurationSource(ABC):
+    """Source of component configurations and their latest jobs."""
+
+    @abstractmethod
+    def get_component_ids(self) -> list[str]:
+        """Get component IDs that have configurations with a successful latest job.
+
+        Returns:
+            list: Component IDs ordered by origin, listing and ID
+        """
+
+    @abstractmethod
+    def iter_configurations(self, component_ids, skip_config_ids=None, batch_size: int = 500):
+        """Stream configurations of the given components, newest job first.
+
+        Args:
+            component_ids: Component IDs to fetch configurations for.
+            skip_config_ids: Configuration IDs to leave out of the result.
+            batch_size: Number of rows read from the source at once.
+
+        Yields:
+            dict: Row as a dictionary keyed by column name, JSON columns are unparsed strings
+        """
+
+    def iter_all_configurations(self, component_ids, batch_size: int = 500):
+        """Stream every configuration of the given components in a single pass.
+
+        Unlike `iter_configurations`, which serves consumers that may stop early,
+        this is meant for reading whole components into the configuration cache.
+        Rows are in no particular order, the cache orders them by job.
+
+        Yields:
+            dict: Row as a dictionary keyed by column name, JSON columns are unparsed strings
+        """
+        return self.iter_configurations(component_ids, batch_size=batch_size)
+
+    def submit_configurations(self, component_ids):
+        """Start fetching configurations of the given components without waiting for them.
+
+        Sources that cannot run queries in the background fetch the rows when
+        the returned function is called.
+
+        Returns:
+            callable: Function returning the rows like `iter_all_configurations`, it blocks
+            until the result is available
+        """
+        return lambda: self.iter_all_configurations(component_ids)
+
+
+def use_arrow_fetch() -> bool:
+    """Return True if Snowflake results should be fetched as Arrow batches.
+
+    `SNOWFLAKE_FETCH_MODE` selects `arrow` (default) or `tuples`. Arrow needs
+    pyarrow, without it the tuple path is used.
+    """
+    if os.getenv("SNOWFLAKE_FETCH_MODE", "arrow").lower() != "arrow":
+        return False
+    return importlib.util.find_spec("pyarrow") is not None
+
+
+def iter_result_columns(cursor, columns: list[str], batch_size: int = 10000):
+    """Stream selected columns of a cursor's result in batches.
+
+    Yields:
+        tuple: Lists of values of the selected columns, one batch at a time
+    """
+    if use_arrow_fetch():
+        for table in cursor.fetch_arrow_batches():
+            yield tuple(table.column(column).to_pylist() for column in columns)
+        return
+
+    names = [desc[0] for desc in cursor.description]
+    indexes = [names.index(column) for column in columns]
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            break
+        yield tuple([row[index] for row in rows] for index in indexes)
+
+
+def iter_result_rows(cursor, key_column: str, select=None, batch_size: int = 500):
+    """Stream a cursor's result as row dictionaries, one fetched batch at a time.
+
+    `select(keys)` gets the values of the key column of a batch and returns the
+    keys whose rows are wanted, only those rows are converted to Python. Nothing
+    refers to a batch once its rows are yielded, so with Arrow the wide JSON
+    columns of rows that were not selected are never converted and each batch
+    can be released before the next one is downloaded.
+    """
+    if use_arrow_fetch():
+        for table in cursor.fetch_arrow_batches():
+            if select is not None:
+                keys = table.column(key_column).to_pylist()
+                wanted = select(keys)
+                table = table.take([index for index, key in enumerate(keys) if key in wanted])
+            yield from table.to_pylist()
+        return
+
+    columns = [desc[0] for desc in cursor.description]
+    key_index = columns.index(key_column)
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            break
+        wanted = select([row[key_index] for row in rows]) if select is not None else None
+        for row in rows:
+            if wanted is None or row[key_index] in wanted:
+                yield dict(zip(columns, row))
+
+
+class SnowflakeSource(ConfigurationSource):
+    """Configurations read from the Keboola Connection tables in Snowflake.
+
+    The latest job of each configuration comes from the local snapshot of
+    `schemas.snapshot` instead of a window function over the whole job table.
+    The connector is imported on first use, so the local source works without it.
+    """
+
+    def get_component_ids(self) -> list[str]:
+        from .db import snowflake_connection
+        from .snapshot import get_latest_job_snapshot
+
+        successful = get_latest_job_snapshot().successful_config_ids()
+        components = {}
+        with snowflake_connection() as conn:
+            cursor = conn.cursor()
+            try:
+                with get_metrics().timer("snowflake_query", query="component_configurations") as event:
+                    cursor.execute(COMPONENT_CONFIGURATIONS_QUERY)
+                    event["rows"] = 0
+                    for batch in iter_result_columns(
+                        cursor, ["config_id", "component_id", "component_listing", "component_origin"]
+                    ):
+                        event["rows"] += len(batch[0])
+                        for config_id, component_id, component_listing, component_origin in zip(*batch):
+                            if config_id in successful:
+                                components[(component_id, component_listing or "", component_origin or "")] = component_id
+            finally:
+                cursor.close()
+        return order_component_ids(components)
+
+    def iter_configurations(self, component_ids, skip_config_ids=None, batch_size: int = 500):
+        """Stream configurations in two steps, so a consumer that stops early does not fetch them all.
+
+        A narrow query reads only the configuration IDs. After ordering them by
+        the latest successful job from the snapshot, the wide JSON columns are
+        fetched newest first in chunks, starting small and doubling up to
+        `batch_size` configurations. No more chunks are queried once the
+        consumer stops reading.
+        """
+        from .db import snowflake_connection
+        from .snapshot import get_latest_job_snapshot
+
+        if not component_ids:
+            return
+
+        skip = set(skip_config_ids or [])
+        with snowflake_connection() as conn:
+            cursor = conn.cursor()
+            try:
+                with get_metrics().timer("snowflake_query", query="configuration_ids") as event:
+                    cursor.execute(CONFIGURATION_IDS_QUERY, (tuple(component_ids),))
+                    config_ids = [
+                        config_id
+                        for batch in iter_result_columns(cursor, ["config_id"], batch_size)
+                        for config_id in batch[0]
+                        if config_id not in skip
+                    ]
+                    event["rows"] = len(config_ids)
+            finally:
+                cursor.close()
+
+        jobs = get_latest_job_snapshot().get_jobs(config_ids)
+        ordered = [
+            config_id for config_id in config_ids
+            if config_id in jobs and jobs[config_id]["job_status"] == "success"
+        ]
+        ordered.sort(key=lambda config_id: jobs[config_id]["job_start_at"], reverse=True)
+
+        start, chunk_size = 0, min(FIRST_DETAILS_CHUNK_SIZE, batch_size)
+        while start < len(ordered):
+            chunk = ordered[start:start + chunk_size]
+            start += len(chunk)
+            chunk_size = min(chunk_size * 2, batch_size)
+
+            with snowflake_connection() as conn:
+                cursor = conn.cursor()
+                try:
+                    with get_metrics().timer("snowflake_query", query="configuration_details") as event:
+                        cursor.execute(CONFIGURATION_DETAILS_QUERY, (tuple(chunk),))
+                        rows = list(iter_result_rows(cursor, "config_id", batch_size=batch_size))
+                        event["rows"] = len(rows)
+                finally:
+                    cursor.close()
+
+            positions = {config_id: position for position, config_id in enumerate(chunk)}
+            rows.sort(key=lambda row: positions[row["config_id"]])
+            for row in rows:
+                row.update(jobs[row["config_id"]])
+                yield row
+
+    def submit_configurations(self, component_ids):
+        """Submit the configuration query as a Snowflake asynchronous query.
+
+        The query runs in the warehouse while the caller does other work, the
+        returned function collects its result by query ID on a pooled connection.
+        """
+        from .db import snowflake_connection
+
+        if not component_ids:
+            return lambda: iter(())
+
+        with snowflake_connection() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute_async(CONFIGURATIONS_QUERY, (tuple(component_ids),))
+                query_id = cursor.sfqid
+            finally:
+                cursor.close()
+        return lambda: self._iter_query_result(query_id)
+
+    def iter_all_configurations(self, component_ids, batch_size: int = 500):
+        """Stream every configuration of the given components with one query.
+
+        The bulk prefetch reads the whole catalogue this way, a single scan
+        instead of the ID query and the chunked detail queries of
+        `iter_configurations`.
+        """
+        if not component_ids:
+            return iter(())
+        return self._iter_result(
+            lambda cursor: cursor.execute(CONFIGURATIONS_QUERY, (tuple(component_ids),)),
+            "configurations",
+            batch_size,
+        )
+
+    def _iter_query_result(self, query_id: str, batch_size: int = 500):
+        # Waits for the query to finish, so only the time not overlapped with other work is measured
+        return self._iter_result(
+            lambda cursor: cursor.get_results_from_sfqid(query_id), "configurations_async", batch_size
+        )
+
+    def _iter_result(self, run_query, query_name: str, batch_size: int):
+        """Stream rows of configurations whose latest job succeeded from the query started by `run_query`."""
+        from .db import snowflake_connection
+        from .snapshot import get_latest_job_snapshot
+
+        snapshot = get_latest_job_snapshot()
+        jobs = {}
+
+        def latest_successful(config_ids):
+            # Only configurations whose latest job succeeded are converted
+            batch_jobs = snapshot.get_jobs(set(config_ids))
+            successful = {config_id for config_id, job in batch_jobs.items() if job["job_status"] == "success"}
+            jobs.update((config_id, batch_jobs[config_id]) for config_id in successful)
+            return successful
+
+        with snowflake_connection() as conn:
+            cursor = conn.cursor()
+            try:
+                with get_metrics().timer("snowflake_query", query=query_name) as event:
+                    run_query(cursor)
+                    event["rows"] = 0
+                    for row in iter_result_rows(cursor, "config_id", latest_successful, batch_size):
+                        row.update(jobs[row["config_id"]])
+                        event["rows"] += 1
+                        yield row
+            finally:
+                cursor.close()
+
+
+def _iso_timestamp(value) -> str:
+    """Format a datetime as an ISO string, UTC with a `Z` suffix."""
+    return value.isoformat().replace("+00:00", "Z")
+
+
+class LocalFileSource(ConfigurationSource):
+    """Configurations read from a local CSV or Parquet export such as `sample_data.csv`.
+
+    The file has one row per configuration row and job, with the columns of the
+    configuration query. It is loaded once, the latest job of each configuration
+    is picked and the same filters as in the Snowflake queries are applied, then
+    the rows are indexed by component ID. JSON columns are kept as strings and
+    parsed only when a row is actually returned to the agents.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._index = None
+        self._component_ids = None
+        self._lock = threading.Lock()
+
+    def _read_rows(self) -> list[dict]:
+        if self.path.endswith(".parquet"):
+            try:
+                import pandas as pd
+            except ImportError as e:
+                raise ImportError("Reading Parquet files requires pandas and pyarrow to be installed") from e
+            frame = pd.read_parquet(self.path)
+            records = frame.astype(object).where(frame.notna(), None).to_dict("records")
+            # Timestamp columns are compared and returned as ISO strings like in the CSV export
+            return [
+                {key: _iso_timestamp(value) if hasattr(value, "isoformat") else value for key, value in record.items()}
+                for record in records
+            ]
+
+        with open(self.path, newline="", encoding="utf-8") as f:
+            return [{key: value or None for key, value in row.items()} for row in csv.DictReader(f)]
+
+    def _load(self):
+        with self._lock:
+            if self._index is not None:
+                return
+
+            # Latest job and distinct rows of every configuration
+            configs = {}
+            for row in self._read_rows():
+                config = configs.setdefault(row["config_id"], {"row": row, "job": None, "rows": {}})
+                if row.get("job_id") and (
+                    config["job"] is None or (row["job_start_at"] or "") > (config["job"]["job_start_at"] or "")
+                ):
+                    config["job"] = row
+                if row.get("row_id"):
+                    config["rows"].setdefault(row["row_id"], row.get("config_row_json"))
+
+            index = {}
+            components = {}
+            for config_id, config in configs.items():
+                row, job = config["row"], config["job"]
+                if job is None or job["job_status"] != "success":
+                    continue
+                if row["config_json"] in (None, "", "{}") or row["stack_id"] not in STACK_IDS:
+                    continue
+
+                base = {
+                    "config_id": config_id,
+                    "stack_id": row["stack_id"],
+                    "component_id": row["component_id"],
+                    "component_type": row["component_type"],
+                    "config_name": row["config_name"],
+                    "config_json": row["config_json"],
+                    "component_listing": row.get("component_listing"),
+                    "job_id": job["job_id"],
+                    "job_start_at": job["job_start_at"],
+                    "job_status": job["job_status"],
+                }
+                config_rows = config["rows"].items() or [(None, None)]
+                index.setdefault(row["component_id"], []).extend(
+                    {**base, "row_id": row_id, "config_row_json": config_row_json}
+                    for row_id, config_row_json in config_rows
+                )
+
+                component_id = row["component_id"]
+                if (
+                    component_id not in EXCLUDED_COMPONENT_IDS
+                    and row["component_type"] not in EXCLUDED_COMPONENT_TYPES
+                    and not component_id.lower().startswith(EXCLUDED_COMPONENT_PREFIX)
+                ):
+                    key = (component_id, row.get("component_listing") or "", row.get("component_origin") or "")
+                    components[key] = component_id
+
+            for rows in index.values():
+                rows.sort(key=lambda r: r["job_start_at"] or "", reverse=True)
+
+            self._component_ids = order_component_ids(components)
+            self._index = index
+
+    def get_component_ids(self) -> list[str]:
+        self._load()
+        return list(self._component_ids)
+
+    def iter_configurations(self, component_ids, skip_config_ids=None, batch_size: int = 500):
+        self._load()
+        skip = set(skip_config_ids or [])
+        rows = [
+            row
+            for component_id in dict.fromkeys(component_ids)
+            for row in self._index.get(component_id, [])
+            if row["config_id"] not in skip
+        ]
+        if len(component_ids) > 1:
+            rows.sort(key=lambda r: r["job_start_at"] or "", reverse=True)
+        yield from rows
+
+
+@process_singleton
+def get_configuration_source() -> ConfigurationSource:
+    """Return the process-wide configuration source.
+
+    `CONFIGURATION_SOURCE` selects the source: `snowflake` (default) or `local`.
+    The local source reads `CONFIGURATION_FILE` (default `sample_data.csv`).
+    """
+    load_dotenv()
+    kind = os.getenv("CONFIGURATION_SOURCE", "snowflake").lower()
+    if kind == "snowflake":
+        return SnowflakeSource()
+    if kind == "local":
+        return LocalFileSource(os.getenv("CONFIGURATION_FILE", "sample_data.csv"))
+    raise ValueError(f"Unknown CONFIGURATION_SOURCE: {kind}")
@@ -0,0 +1,49 @@
+import functools
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+
+class SQLiteStore:
+    """Base of the local SQLite files such as caches and the run journal.
+
+    Every operation opens a short-lived connection, which waits up to
+    `timeout` seconds for a lock held by another thread or process.
+    """
+
+    timeout = 30
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=self.timeout)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+
+def process_singleton(factory):
+    """Make `factory` create its object on the first call and return the same object afterwards.
+
+    The first call may come from any thread, creation is guarded by a lock.
+    """
+    instance = None
+    lock = threading.Lock()
+
+    @functools.wraps(factory)
+    def get():
+        nonlocal instance
+        with lock:
+            if instance is None:
+                instance = factory()
+            return instance
+
+    return get
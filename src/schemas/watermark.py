@@ -0,0 +1,44 @@
+import hashlib
+import json
+
+from .cache import get_configuration_cache
+from .processor import get_configurations
+
+
+def compute_watermark(rows) -> dict:
+    """Return the watermark of a component's configuration rows.
+
+    Returns:
+        dict: Newest `job_start_at` and a `content_hash` of the configuration IDs and JSON
+    """
+    digest = hashlib.sha256()
+    max_job_start_at = None
+    for row in sorted(rows, key=lambda row: (row["config_id"], row.get("row_id") or "")):
+        digest.update(json.dumps(
+            [row["config_id"], row.get("row_id"), row["config_json"], row.get("config_row_json")]
+        ).encode("utf-8"))
+        job_start_at = row.get("job_start_at")
+        if job_start_at and (max_job_start_at is None or str(job_start_at) > max_job_start_at):
+            max_job_start_at = str(job_start_at)
+    return {"max_job_start_at": max_job_start_at, "content_hash": digest.hexdigest()}
+
+
+def get_component_watermark(component_id: str) -> dict:
+    """Return the current watermark of a component, preferring the prefetched cache."""
+    cache = get_configuration_cache()
+    if cache.has_component(component_id):
+        rows = cache.get_configurations(component_id)
+    else:
+        rows = get_configurations([component_id])
+    return compute_watermark(rows)
+
+
+def describe_change(stored: dict, current: dict):
+    """Return why the configurations changed between two watermarks, or None if they did not."""
+    if stored is None:
+        return "no watermark recorded"
+    if stored["content_hash"] != current["content_hash"]:
+        return "configurations changed"
+    if stored["max_job_start_at"] != current["max_job_start_at"]:
+        return f"newer jobs since {stored['max_job_start_at']}"
+    return None